@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from generator import generate
+from logic import *
+
+SYMBOLS = 24
+CHARACTERS = 6
+DEPTH = 2
+SEED = 0
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3] or sys.argv[1] not in BENCHMARKS:
+        sys.exit("Usage: python benchmark.py (parallel|puzzles) [size]")
+    benchmark, default = BENCHMARKS[sys.argv[1]]
+    benchmark(int(sys.argv[2]) if len(sys.argv) == 3 else default)
+
+
+def parallel(n):
+    """Reports parallel model checking speedup on a synthetic knowledge base."""
+    knowledge, query = synthetic(n)
+    print(f"Parallel model checking ({n} symbols, {os.cpu_count()} cores)")
+
+    # Sequential checker, for reference
+    start = time.perf_counter()
+    assert model_check(knowledge, query)
+    baseline = time.perf_counter() - start
+    print(f"  sequential: {baseline:.2f}s")
+
+    # Parallel checker, doubling processes up to the number of cores
+    processes = 1
+    while processes <= os.cpu_count():
+        start = time.perf_counter()
+        assert model_check(knowledge, query, processes=processes)
+        elapsed = time.perf_counter() - start
+        print(f"  {processes} processes: {elapsed:.2f}s "
+              f"(speedup {baseline / elapsed:.2f}x)")
+        processes *= 2
+
+
+def synthetic(n):
+    """
+    Returns a knowledge base over n symbols and a query it entails.
+
+    Knowledge is a chain of disjunctions of neighbouring symbols, which is
+    not a set of definite clauses, so every model must be enumerated.
+    """
+    symbols = [Symbol(f"P{i}") for i in range(n)]
+    knowledge = And(*[
+        Or(symbols[i], symbols[i + 1]) for i in range(n - 1)
+    ])
+    query = Or(symbols[0], symbols[1])
+    return knowledge, query
+
+
+def puzzles(max_characters):
+    """
+    Reports time and peak memory of each backend on random knights and
+    knaves puzzles of growing size, checking that all backends agree.
+    """
+    backends = [
+        ("model_check", lambda knowledge, symbols: [
+            symbol for symbol in symbols if model_check(knowledge, symbol)
+        ]),
+        ("entailed_literals", lambda knowledge, symbols: [
+            literal for literal in entailed_literals(knowledge, symbols)
+            if isinstance(literal, Symbol)
+        ]),
+        ("parallel", lambda knowledge, symbols: [
+            symbol for symbol in symbols
+            if model_check(knowledge, symbol, processes=os.cpu_count())
+        ])
+    ]
+    print(f"Knights and knaves puzzles (depth {DEPTH}, seed {SEED})")
+    for n in range(1, max_characters + 1):
+        symbols, knowledge = generate(n, depth=DEPTH, seed=SEED + n)
+        print(f"  {n} characters, {node_count(knowledge)} nodes:")
+
+        expected = None
+        for name, backend in backends:
+            tracemalloc.start()
+            start = time.perf_counter()
+            entailed = backend(knowledge, symbols)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            if expected is None:
+                expected = entailed
+            elif entailed != expected:
+                sys.exit(f"{name} disagrees with {backends[0][0]}")
+            print(f"    {name}: {elapsed:.3f}s, {peak / 1024:.0f} KiB peak")
+
+
+BENCHMARKS = {
+    "parallel": (parallel, SYMBOLS),
+    "puzzles": (puzzles, CHARACTERS)
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import random
+
+from logic import *
+
+
+def characters(n):
+    """Returns (name, knight, knave) for each of n characters."""
+    names = [chr(ord("A") + i) if i < 26 else f"P{i}" for i in range(n)]
+    return [
+        (name, Symbol(f"{name} is a Knight"), Symbol(f"{name} is a Knave"))
+        for name in names
+    ]
+
+
+def statement(people, depth, rng):
+    """
+    Returns a random statement about people, nested up to depth levels.
+
+    Statements are claims that someone is a knight or a knave, negations,
+    conjunctions and disjunctions of statements, and claims that someone
+    else said a statement, which holds exactly when that person is a knight.
+    """
+    kind = rng.choice(["atom"] if depth == 0 else
+                      ["atom", "not", "and", "or", "says"])
+    if kind == "atom":
+        _, knight, knave = rng.choice(people)
+        return rng.choice([knight, knave])
+    if kind == "not":
+        return Not(statement(people, depth - 1, rng))
+    if kind == "says":
+        _, knight, _ = rng.choice(people)
+        return Biconditional(knight, statement(people, depth - 1, rng))
+    operands = [statement(people, depth - 1, rng) for _ in range(2)]
+    return And(*operands) if kind == "and" else Or(*operands)
+
+
+def generate(n, depth=2, seed=None):
+    """
+    Returns the symbols and knowledge base of a random puzzle in which each
+    of n characters, a knight or a knave, says one statement.
+    """
+    rng = random.Random(seed)
+    people = characters(n)
+    knowledge = []
+    for _, knight, knave in people:
+
+        # premise: each character is either a knight or a knave, but not both
+        knowledge.append(Or(knight, knave))
+        knowledge.append(Not(And(knight, knave)))
+
+        # knights tell the truth and knaves lie
+        said = statement(people, depth, rng)
+        knowledge.append(Biconditional(knight, said))
+        knowledge.append(Biconditional(knave, Not(said)))
+
+    symbols = [symbol for _, knight, knave in people
+               for symbol in (knight, knave)]
+    return symbols, And(*knowledge)
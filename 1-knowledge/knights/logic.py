@@ -1,7 +1,50 @@
+import collections
 import itertools
+import multiprocessing
+import re
+import weakref
 
 
 class Sentence():
+    """
+    Immutable logical sentence.
+
+    Sentences are hash-consed: constructing a sentence that is structurally
+    identical to a live one returns the existing object, so identical
+    subformulas are stored once and equality is identity.
+    """
+
+    __slots__ = ("_args", "_hash", "_symbols", "_simplified", "__weakref__")
+
+    # Live sentences, keyed by class and constructor arguments
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _make(cls, args, symbols, **fields):
+        """Returns the interned sentence of class cls built from args."""
+        key = (cls, args)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "_args", args)
+            object.__setattr__(sentence, "_hash", hash((cls.__name__, args)))
+            object.__setattr__(sentence, "_symbols", symbols)
+            for field, value in fields.items():
+                object.__setattr__(sentence, field, value)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self._args)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +55,8 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -42,16 +85,19 @@ class Sentence():
             return f"({s})"
 
 
-class Symbol(Sentence):
+def _union(sentences):
+    """Returns the frozenset of symbols used by any of sentences."""
+    if len(sentences) == 1:
+        return sentences[0].symbols()
+    return frozenset().union(*[sentence.symbols() for sentence in sentences])
+
 
-    def __init__(self, name):
-        self.name = name
+class Symbol(Sentence):
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    __slots__ = ("name",)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls._make((name,), frozenset((name,)), name=name)
 
     def __repr__(self):
         return self.name
@@ -65,20 +111,14 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._make((operand,), operand.symbols(), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +129,15 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        return cls._make(conjuncts, _union(conjuncts), conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +146,18 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """
+        Conjunctions are immutable and cannot be added to in place; use
+        `knowledge = knowledge.with_conjunct(conjunct)` instead.
+        """
+        raise TypeError(
+            "And is immutable; use knowledge = knowledge.with_conjunct(...)"
+        )
+
+    def with_conjunct(self, conjunct):
+        """Returns a new conjunction with conjunct appended."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +168,15 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        return cls._make(disjuncts, _union(disjuncts), disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +191,18 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    __slots__ = ("antecedent", "consequent")
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __new__(cls, antecedent, consequent):
+        Sentence.validate(antecedent)
+        Sentence.validate(consequent)
+        return cls._make(
+            (antecedent, consequent), _union((antecedent, consequent)),
+            antecedent=antecedent, consequent=consequent
+        )
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,45 +216,284 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    __slots__ = ("left", "right")
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __new__(cls, left, right):
+        Sentence.validate(left)
+        Sentence.validate(right)
+        return cls._make(
+            (left, right), _union((left, right)), left=left, right=right
+        )
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+# Constants: the empty conjunction is true, the empty disjunction is false
+TRUE = And()
+FALSE = Or()
+
+
+def node_count(sentence):
+    """Returns the number of nodes in the expression tree of sentence."""
+    counts = dict()
+
+    def count(sentence):
+        if sentence not in counts:
+            counts[sentence] = 1 + sum(
+                count(arg) for arg in sentence._args
+                if isinstance(arg, Sentence)
+            )
+        return counts[sentence]
+
+    return count(sentence)
+
+
+def simplify(sentence):
+    """
+    Returns an equivalent sentence in negation normal form.
+
+    Implications are rewritten as disjunctions and negations are pushed
+    down to symbols. Biconditionals are kept rather than expanded, which
+    would duplicate their operands; a negated biconditional becomes a
+    biconditional with its right side negated. Nested conjunctions and
+    disjunctions are flattened, and duplicate operands, complementary
+    literals and the constants TRUE and FALSE are folded away. The result
+    is computed once per sentence and cached on it.
+    """
+    memo = dict()
+
+    def conjoin(operands):
+        """Returns the simplified conjunction of simplified operands."""
+        conjuncts = dict()
+        for operand in operands:
+            if operand is FALSE:
+                return FALSE
+            for conjunct in (operand.conjuncts if isinstance(operand, And)
+                             else (operand,)):
+                if complement(conjunct) in conjuncts:
+                    return FALSE
+                conjuncts[conjunct] = None
+        if len(conjuncts) == 1:
+            return next(iter(conjuncts))
+        return And(*conjuncts)
+
+    def disjoin(operands):
+        """Returns the simplified disjunction of simplified operands."""
+        disjuncts = dict()
+        for operand in operands:
+            if operand is TRUE:
+                return TRUE
+            for disjunct in (operand.disjuncts if isinstance(operand, Or)
+                             else (operand,)):
+                if complement(disjunct) in disjuncts:
+                    return TRUE
+                disjuncts[disjunct] = None
+        if len(disjuncts) == 1:
+            return next(iter(disjuncts))
+        return Or(*disjuncts)
+
+    def equate(left, right):
+        """Returns the simplified biconditional of simplified operands."""
+        if left is right:
+            return TRUE
+        if left is FALSE or right is FALSE:
+            other = right if left is FALSE else left
+            return nnf(other, True)
+        if left is TRUE or right is TRUE:
+            return right if left is TRUE else left
+        if complement(left) is right:
+            return FALSE
+        return Biconditional(left, right)
+
+    def complement(literal):
+        """Returns the negation of a literal, or None for other sentences."""
+        if isinstance(literal, Symbol):
+            return Not(literal)
+        if isinstance(literal, Not):
+            return literal.operand
+        return None
+
+    def nnf(sentence, negated):
+        """Returns simplified sentence, or its negation if negated."""
+        key = (sentence, negated)
+        if key in memo:
+            return memo[key]
+
+        if isinstance(sentence, Symbol):
+            result = Not(sentence) if negated else sentence
+        elif isinstance(sentence, Not):
+            result = nnf(sentence.operand, not negated)
+        elif isinstance(sentence, And):
+            operands = [nnf(conjunct, negated)
+                        for conjunct in sentence.conjuncts]
+            result = disjoin(operands) if negated else conjoin(operands)
+        elif isinstance(sentence, Or):
+            operands = [nnf(disjunct, negated)
+                        for disjunct in sentence.disjuncts]
+            result = conjoin(operands) if negated else disjoin(operands)
+        elif isinstance(sentence, Implication):
+            antecedent, consequent = sentence.antecedent, sentence.consequent
+            if negated:
+                result = conjoin([nnf(antecedent, False),
+                                  nnf(consequent, True)])
+            else:
+                result = disjoin([nnf(antecedent, True),
+                                  nnf(consequent, False)])
+        elif isinstance(sentence, Biconditional):
+            result = equate(nnf(sentence.left, False),
+                            nnf(sentence.right, negated))
+        else:
+            raise TypeError(f"cannot simplify {type(sentence).__name__}")
+
+        memo[key] = result
+        return result
+
+    # Sentences are immutable, so each one's simplified form is kept on it
+    # and repeated queries against the same knowledge base reuse it
+    Sentence.validate(sentence)
+    simplified = getattr(sentence, "_simplified", None)
+    if simplified is None:
+        simplified = nnf(sentence, False)
+        object.__setattr__(sentence, "_simplified", simplified)
+    return simplified
+
+
+def horn_clauses(knowledge):
+    """
+    Returns knowledge as a list of definite clauses, or None if it is not
+    a conjunction of definite clauses.
+
+    Each clause is a (premises, conclusion) pair of a frozenset of symbol
+    names and a symbol name. Facts, implications from a symbol or a
+    conjunction of symbols to a symbol, and disjunctions of literals with
+    exactly one positive symbol are recognized.
+    """
+    clauses = []
+    stack = [knowledge]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, And):
+            stack.extend(reversed(sentence.conjuncts))
+        elif isinstance(sentence, Symbol):
+            clauses.append((frozenset(), sentence.name))
+        elif isinstance(sentence, Implication):
+            if not isinstance(sentence.consequent, Symbol):
+                return None
+            premises = _conjoined_symbols(sentence.antecedent)
+            if premises is None:
+                return None
+            clauses.append((premises, sentence.consequent.name))
+        elif isinstance(sentence, Or):
+            positive = [disjunct for disjunct in sentence.disjuncts
+                        if isinstance(disjunct, Symbol)]
+            negative = [disjunct.operand for disjunct in sentence.disjuncts
+                        if isinstance(disjunct, Not)
+                        and isinstance(disjunct.operand, Symbol)]
+            if (len(positive) != 1
+                    or len(positive) + len(negative) != len(sentence.disjuncts)):
+                return None
+            clauses.append((
+                frozenset(symbol.name for symbol in negative),
+                positive[0].name
+            ))
+        else:
+            return None
+    return clauses
+
+
+def _conjoined_symbols(sentence):
+    """Returns names of a symbol or conjunction of symbols, else None."""
+    names = set()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            names.add(sentence.name)
+        elif isinstance(sentence, And):
+            stack.extend(sentence.conjuncts)
+        else:
+            return None
+    return frozenset(names)
+
+
+def horn_closure(clauses, goal=None):
+    """
+    Returns the set of symbol names entailed by definite clauses.
+
+    Uses agenda-based forward chaining, keeping for each clause a count of
+    premises not yet inferred, so every clause is visited once per premise.
+    Stops early once goal, if given, has been inferred.
+    """
+    count = []
+    conclusions = []
+    premise_of = collections.defaultdict(list)
+    agenda = collections.deque()
+
+    for i, (premises, conclusion) in enumerate(clauses):
+        count.append(len(premises))
+        conclusions.append(conclusion)
+        for premise in premises:
+            premise_of[premise].append(i)
+        if not premises:
+            agenda.append(conclusion)
+
+    inferred = set()
+    while agenda:
+        p = agenda.popleft()
+        if p in inferred:
+            continue
+        inferred.add(p)
+        if p == goal:
+            break
+
+        # Conclude any clause whose premises have now all been inferred
+        for i in premise_of.get(p, ()):
+            count[i] -= 1
+            if count[i] == 0:
+                agenda.append(conclusions[i])
+
+    return inferred
+
+
+def forward_chain(knowledge, query):
+    """Checks if a knowledge base of definite clauses entails a symbol."""
+    Sentence.validate(query)
+    clauses = horn_clauses(knowledge)
+    if clauses is None:
+        raise ValueError("knowledge is not a conjunction of definite clauses")
+    if not isinstance(query, Symbol):
+        raise ValueError("query must be a symbol")
+    return query.name in horn_closure(clauses, goal=query.name)
+
+
+def model_check(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query.
+
+    If processes is given, models are enumerated in parallel: the first
+    split symbols are fixed in each of their 2^split combinations, and the
+    resulting subproblems are checked on a pool of that many processes,
+    stopping as soon as any of them finds a counter-model.
+    """
+
+    # Definite clauses entail a symbol exactly when forward chaining
+    # infers it, which avoids enumerating models at all
+    if isinstance(query, Symbol):
+        clauses = horn_clauses(knowledge)
+        if clauses is not None:
+            return query.name in horn_closure(clauses, goal=query.name)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -256,8 +523,351 @@ def model_check(knowledge, query):
             return (check_all(knowledge, query, remaining, model_true) and
                     check_all(knowledge, query, remaining, model_false))
 
+    # Check the simplified forms, which have the same models
+    knowledge = simplify(knowledge)
+    query = simplify(query)
+
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
+
+    # Check subproblems in parallel, if requested
+    if processes is not None:
+        return _parallel_check(knowledge, query, sorted(symbols),
+                               processes, split)
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Knowledge base and query shared by the processes of a parallel check
+_shared = None
+
+
+def _share(knowledge, query):
+    """Stores the sentences checked by a pool process."""
+    global _shared
+    _shared = (knowledge, query)
+
+
+def _check_subproblem(task):
+    """Checks entailment in every model extending a fixed assignment."""
+    knowledge, query = _shared
+    fixed, free = task
+    model = dict(fixed)
+    for values in itertools.product((True, False), repeat=len(free)):
+        model.update(zip(free, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+def _parallel_check(knowledge, query, symbols, processes, split=None):
+    """Checks entailment by splitting models over a process pool."""
+    if processes < 1:
+        raise ValueError("processes must be at least 1")
+
+    # By default, make a few subproblems per process to balance load
+    if split is None:
+        split = (processes - 1).bit_length() + 2
+    split = min(split, len(symbols))
+    fixed, free = symbols[:split], symbols[split:]
+    tasks = [
+        (list(zip(fixed, values)), free)
+        for values in itertools.product((True, False), repeat=split)
+    ]
+
+    # Leaving the pool terminates any workers still running
+    with multiprocessing.Pool(processes, initializer=_share,
+                              initargs=(knowledge, query)) as pool:
+        for entailed in pool.imap_unordered(_check_subproblem, tasks):
+            if not entailed:
+                return False
+    return True
+
+
+def models(knowledge):
+    """Yields every model of the symbols in knowledge in which it is true."""
+
+    # Enumerate each assignment of truth values to the symbols once,
+    # evaluating the simplified knowledge base in each
+    symbols = sorted(knowledge.symbols())
+    knowledge = simplify(knowledge)
+    for values in itertools.product((True, False), repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if knowledge.evaluate(model):
+            yield model
+
+
+def entailed_literals(knowledge, symbols):
+    """
+    Returns the literals over symbols entailed by knowledge base.
+
+    Every query is answered from a single enumeration of the models of
+    knowledge: a symbol is entailed if it is true in all of them, and its
+    negation is entailed if it is false in all of them.
+    """
+    symbols = list(symbols)
+    for symbol in symbols:
+        Sentence.validate(symbol)
+
+    # Definite clauses are always satisfiable (by making every symbol true),
+    # so they entail exactly the symbols inferred by forward chaining
+    clauses = horn_clauses(knowledge)
+    if clauses is not None:
+        inferred = horn_closure(clauses)
+        return [symbol for symbol in symbols if symbol.name in inferred]
+
+    # Symbols outside knowledge are unconstrained, so never entailed
+    # unless knowledge has no models at all
+    names = knowledge.symbols()
+    candidates = None
+
+    for model in models(knowledge):
+
+        # Values in the first model are the only ones that can be entailed
+        if candidates is None:
+            candidates = {
+                symbol.name: model[symbol.name]
+                for symbol in symbols if symbol.name in names
+            }
+
+        # Discard values contradicted by this model
+        for name in [name for name in candidates
+                     if candidates[name] != model[name]]:
+            del candidates[name]
+        if not candidates:
+            break
+
+    # An unsatisfiable knowledge base entails everything
+    if candidates is None:
+        return [literal for symbol in symbols
+                for literal in (symbol, Not(symbol))]
+
+    return [symbol if candidates[symbol.name] else Not(symbol)
+            for symbol in symbols if symbol.name in candidates]
+
+
+# Tokens of the formula syntax, with ASCII equivalents of each operator
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<iff><=>|<->)
+      | (?P<implies>=>|->)
+      | (?P<not>[¬~!])
+      | (?P<and>[∧&])
+      | (?P<or>[∨|])
+      | (?P<open>\()
+      | (?P<close>\))
+      | (?P<symbol>(?:(?!<=>|<->|=>|->)[^()¬~!∧&∨|])+)
+    )
+""", re.VERBOSE)
+
+
+def parse(text):
+    """
+    Returns the sentence written in formula syntax.
+
+    Accepts the output of Sentence.formula(), as well as ASCII operators:
+    ~ or ! for ¬, & for ∧, | for ∨, -> for => and <-> for <=>. Symbol names
+    may contain spaces but no operators or parentheses. Conjunctions and
+    disjunctions are n-ary, implication associates to the right, and
+    parentheses group, so formulas of nested sentences read back with the
+    same structure. The only exceptions are conjunctions and disjunctions
+    of fewer than two operands, whose formulas are those of their operand
+    or empty; dumps and loads preserve those too.
+    """
+
+    # Split text into (kind, value) tokens
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected character at {position}: {text!r}")
+        kind = match.lastgroup
+        value = match.group(kind).strip() if kind == "symbol" else None
+        if kind != "symbol" or value:
+            tokens.append((kind, value))
+        position = match.end()
+    tokens.append((None, None))
+    index = 0
+
+    def accept(kind):
+        nonlocal index
+        if tokens[index][0] == kind:
+            index += 1
+            return True
+        return False
+
+    def biconditional():
+        sentence = implication()
+        while accept("iff"):
+            sentence = Biconditional(sentence, implication())
+        return sentence
+
+    def implication():
+        sentence = disjunction()
+        if accept("implies"):
+            return Implication(sentence, implication())
+        return sentence
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while accept("or"):
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [negation()]
+        while accept("and"):
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        nonlocal index
+        if accept("not"):
+            return Not(negation())
+        if accept("open"):
+            sentence = biconditional()
+            if not accept("close"):
+                raise ValueError(f"expected ')' in {text!r}")
+            return sentence
+        kind, value = tokens[index]
+        if kind != "symbol":
+            raise ValueError(f"expected symbol in {text!r}")
+        index += 1
+        return Symbol(value)
+
+    sentence = biconditional()
+    if tokens[index][0] is not None:
+        raise ValueError(f"unexpected {tokens[index][0]} in {text!r}")
+    return sentence
+
+
+# Binary serialization: a magic header, the byte length of the record, then
+# each distinct node once, children before parents, as a tag followed by
+# varint operands. Symbols store their UTF-8 name, other nodes store the
+# indices of their operands, and the root is the last node.
+_MAGIC = b"LGC\x01"
+_TAGS = (Symbol, Not, And, Or, Implication, Biconditional)
+
+
+def _write_varint(out, n):
+    """Appends non-negative integer n to bytearray out as a varint."""
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, position):
+    """Returns the varint in data at position and the position after it."""
+    n = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, position
+        shift += 7
+
+
+def dumps(sentence):
+    """Returns the compact binary serialization of sentence."""
+    Sentence.validate(sentence)
+    body = bytearray()
+    indices = dict()
+
+    # Emit nodes in post-order, sharing repeated subformulas
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in indices:
+            continue
+        operands = [arg for arg in node._args if isinstance(arg, Sentence)]
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((operand, False) for operand in reversed(operands))
+            continue
+
+        tag = _TAGS.index(type(node))
+        body.append(tag)
+        if isinstance(node, Symbol):
+            name = node.name.encode("utf-8")
+            _write_varint(body, len(name))
+            body.extend(name)
+        else:
+            if isinstance(node, (And, Or)):
+                _write_varint(body, len(operands))
+            for operand in operands:
+                _write_varint(body, indices[operand])
+        indices[node] = len(indices)
+
+    out = bytearray(_MAGIC)
+    _write_varint(out, len(body))
+    return bytes(out + body)
+
+
+def loads(data):
+    """Returns the sentence serialized in data by dumps."""
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("not a serialized sentence")
+    length, position = _read_varint(data, len(_MAGIC))
+    return _decode(memoryview(data)[position:position + length])
+
+
+def _decode(body):
+    """Returns the sentence serialized in a record body."""
+    nodes = []
+    position = 0
+    while position < len(body):
+        cls = _TAGS[body[position]]
+        position += 1
+        if cls is Symbol:
+            length, position = _read_varint(body, position)
+            name = str(body[position:position + length], "utf-8")
+            position += length
+            nodes.append(Symbol(name))
+            continue
+        count = 2 if cls in (Implication, Biconditional) else 1
+        if cls in (And, Or):
+            count, position = _read_varint(body, position)
+        operands = []
+        for _ in range(count):
+            i, position = _read_varint(body, position)
+            operands.append(nodes[i])
+        nodes.append(cls(*operands))
+    if not nodes:
+        raise ValueError("empty serialized sentence")
+    return nodes[-1]
+
+
+def dump(sentence, file):
+    """Writes the binary serialization of sentence to a binary file."""
+    file.write(dumps(sentence))
+
+
+def load(file):
+    """
+    Reads the next serialized sentence from a binary file, or returns None
+    at end of file. Sentences written by successive calls to dump can be
+    streamed back one record at a time.
+    """
+    header = file.read(len(_MAGIC))
+    if not header:
+        return None
+    if header != _MAGIC:
+        raise ValueError("not a serialized sentence")
+    length = shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            raise ValueError("truncated serialized sentence")
+        length |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            break
+        shift += 7
+    body = file.read(length)
+    if len(body) != length:
+        raise ValueError("truncated serialized sentence")
+    return _decode(memoryview(body))
@@ -1,3 +1,5 @@
+import sys
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -120,14 +122,19 @@ def main():
         ("Puzzle 2", knowledge2),
         ("Puzzle 3", knowledge3)
     ]
+    stats = "--stats" in sys.argv[1:]
     for puzzle, knowledge in puzzles:
         print(puzzle)
+        if stats:
+            simplified = simplify(knowledge)
+            print(f"    ({node_count(knowledge)} nodes, "
+                  f"{node_count(simplified)} simplified)")
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            for literal in entailed_literals(knowledge, symbols):
+                if isinstance(literal, Symbol):
+                    print(f"    {literal}")
 
 
 if __name__ == "__main__":
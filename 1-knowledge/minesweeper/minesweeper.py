@@ -1,7 +1,24 @@
+import array
 import copy
 import itertools
+import math
 import random
 
+# Most backtracking steps spent enumerating one frontier component's mine
+# configurations, and most cells in a component to try enumerating, before
+# approximating its probabilities instead
+ENUMERATION_LIMIT = 20000
+COMPONENT_LIMIT = 400
+
+# Most frontier cells for which the global mine count is combined exactly
+# across components, rather than approximated by a per-cell mine density
+EXACT_FRONTIER_LIMIT = 64
+
+# Ways MinesweeperAI can draw conclusions from its knowledge: combining
+# pairs of sentences where one's cells are a subset of the other's, or also
+# solving the frontier's sentences together as a system of linear equations
+SOLVERS = ("subset", "linear")
+
 
 class Minesweeper():
     """
@@ -16,20 +33,22 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * self.width for i in range(self.height)]
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Count each cell's neighboring mines once, by convolving the mines
+        # with a 3x3 kernel: every mine adds one to each of its neighbors
+        self.counts = array.array("B", bytes(height * width))
+        for i, j in self.mines:
+            for a in range(max(i - 1, 0), min(i + 2, height)):
+                for b in range(max(j - 1, 0), min(j + 2, width)):
+                    if (a, b) != (i, j):
+                        self.counts[a * width + b] += 1
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -59,24 +78,31 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        return self.counts[cell[0] * self.width + cell[1]]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
+    def reveal_region(self, cell, revealed=()):
+        """
+        Returns a list of (cell, count) pairs for the cells revealed by
+        clicking on a safe cell: the cell itself and, if it has no
+        neighboring mines, every cell reachable through cells with no
+        neighboring mines, flood-filling the empty region and its border.
+        Cells in `revealed` are left out and not expanded.
+        """
+        region = [(cell, self.nearby_mines(cell))]
+        seen = {cell}
 
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        for (i, j), count in region:
+            if count:
+                continue
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+            # reveal every neighbor of a cell with no neighboring mines
+            for a in range(max(i - 1, 0), min(i + 2, self.height)):
+                for b in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (a, b) not in seen and (a, b) not in revealed:
+                        seen.add((a, b))
+                        region.append(((a, b), self.nearby_mines((a, b))))
 
-        return count
+        return region
 
     def won(self):
         """
@@ -142,17 +168,234 @@ class Sentence():
         self.cells.remove(cell)
 
 
+class BitmaskSentence():
+    """
+    Sentence whose cells are stored as an integer bitmask over the board,
+    where cell (i, j) is bit i * width + j. Subset tests, differences,
+    equality and hashing are single integer operations.
+
+    To keep masks small on large boards, the mask is stored shifted down
+    by `offset`, the index of the sentence's lowest cell, so it only spans
+    the rows the sentence covers.
+
+    Provides the same interface as Sentence: `cells` and the known and
+    mark methods work with (i, j) cells.
+    """
+
+    __slots__ = ("mask", "count", "width", "offset")
+
+    def __init__(self, mask, count, width, offset=0):
+        self.mask = mask
+        self.count = count
+        self.width = width
+        self.offset = offset
+        self.normalize()
+
+    @classmethod
+    def from_cells(cls, cells, count, width):
+        """
+        Returns the bitmask sentence about a collection of (i, j) cells.
+        """
+        indices = [i * width + j for i, j in cells]
+        offset = min(indices, default=0)
+        mask = 0
+        for index in indices:
+            mask |= 1 << (index - offset)
+        return cls(mask, count, width, offset)
+
+    @classmethod
+    def from_sentence(cls, sentence, width):
+        """
+        Returns the bitmask sentence equivalent to a Sentence.
+        """
+        return cls.from_cells(sentence.cells, sentence.count, width)
+
+    def to_sentence(self):
+        """
+        Returns the Sentence equivalent to this sentence.
+        """
+        return Sentence(self.cells, self.count)
+
+    def normalize(self):
+        """
+        Shifts the mask so that its lowest set bit is bit 0.
+        """
+        if not self.mask:
+            self.offset = 0
+            return
+        low = (self.mask & -self.mask).bit_length() - 1
+        if low:
+            self.mask >>= low
+            self.offset += low
+
+    def key(self):
+        """
+        Returns a hashable key identifying the sentence's cells and count.
+        """
+        return self.offset, self.mask, self.count
+
+    def __eq__(self, other):
+        if isinstance(other, BitmaskSentence):
+            return self.key() == other.key()
+        return self.cells == other.cells and self.count == other.count
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    @property
+    def cells(self):
+        return {divmod(index, self.width) for index in self.indices()}
+
+    def indices(self):
+        """
+        Yields the bit index of each cell in the sentence, lowest first.
+        """
+        for index in mask_indices(self.mask):
+            yield self.offset + index
+
+    def issubset(self, other):
+        """
+        Returns whether every cell in self is also in other.
+        """
+        if not self.mask:
+            return True
+        if self.offset < other.offset:
+            return False
+        return (self.mask << (self.offset - other.offset)) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of self not in other,
+        given that other's cells are a subset of self's.
+        """
+        offset = min(self.offset, other.offset)
+        mask = (self.mask << (self.offset - offset)) & ~(
+            other.mask << (other.offset - offset)
+        )
+        return BitmaskSentence(
+            mask, self.count - other.count, self.width, offset
+        )
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if len(self) == self.count:
+            return self.cells
+
+        return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+
+        return set()
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        if self.remove(cell):
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        self.remove(cell)
+
+    def remove(self, cell):
+        """
+        Removes a cell from the sentence, returning whether it was in it.
+        """
+        shift = cell[0] * self.width + cell[1] - self.offset
+        if shift < 0 or not self.mask >> shift & 1:
+            return False
+
+        self.mask ^= 1 << shift
+        self.normalize()
+        return True
+
+
+def mask_indices(mask):
+    """
+    Yields the index of each set bit of a bitmask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class RandomSet():
+    """
+    Set supporting constant-time removal and random choice, by keeping its
+    items in a list along with each item's position in it.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.positions = dict()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+
+        # move the last item into the removed one's place
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        return random.choice(self.items)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, solver="subset"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
+        # How to draw conclusions from knowledge
+        if solver not in SOLVERS:
+            raise ValueError(f"solver must be one of {', '.join(SOLVERS)}")
+        self.solver = solver
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -160,17 +403,38 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Cells known to be safe that have not been clicked on yet
+        self.safe_moves = RandomSet()
+
+        # Bit indices of cells neither clicked on nor known to be mines,
+        # with each one's position in that array, for constant-time removal
+        # and random choice
+        self.candidates = array.array("l", range(height * width))
+        self.candidate_positions = array.array("l", range(height * width))
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Index from each cell's bit index to the sentences containing it
+        self.cell_sentences = dict()
+
+        # Key of every sentence in knowledge, to avoid duplicates
+        self.sentence_keys = set()
+
+        # Sentences added or changed since inference last ran, by id
+        self.pending = dict()
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.remove_candidate(cell)
+        for sentence in self.cell_sentences.pop(cell[0] * self.width + cell[1], ()):
+            self.sentence_keys.discard(sentence.key())
             sentence.mark_mine(cell)
+            self.sentence_changed(sentence)
 
     def mark_safe(self, cell):
         """
@@ -178,8 +442,12 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in self.cell_sentences.pop(cell[0] * self.width + cell[1], ()):
+            self.sentence_keys.discard(sentence.key())
             sentence.mark_safe(cell)
+            self.sentence_changed(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -197,32 +465,103 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
 
-        # mark move made
-        self.moves_made.add(cell)
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, revealed):
+        """
+        Adds knowledge about several revealed cells at once, given a list
+        of (cell, count) pairs, such as a region revealed by flood fill.
+
+        All of the cells are marked and their sentences added before
+        inference runs, so the whole batch is absorbed in one pass.
+        """
+
+        for cell, _ in revealed:
 
-        # mark cell as safe
-        self.mark_safe(cell)
+            # mark move made
+            self.moves_made.add(cell)
+            self.safe_moves.discard(cell)
+            self.remove_candidate(cell)
 
-        # explore unmarked neighbors
-        neighbours, neighbor_mines = self.get_unmarked_neighbors(cell)
+            # mark cell as safe
+            self.mark_safe(cell)
 
-        count -= neighbor_mines
+        for cell, count in revealed:
 
-        # add new sentence to knowledge
-        new_sentence = Sentence(neighbours, count)
-        self.knowledge.append(new_sentence)
+            # explore unmarked neighbors
+            neighbours, neighbor_mines = self.get_unmarked_neighbors(cell)
 
-        # infer new knowledge
+            count -= neighbor_mines
+
+            # add new sentence to knowledge
+            new_sentence = BitmaskSentence.from_cells(neighbours, count, self.width)
+            self.add_sentence(new_sentence)
+
+        # infer new knowledge, marking new safes and mines
         self.infer_knowledge()
 
+        # solve the frontier as a linear system, until it yields nothing new
+        if self.solver == "linear":
+            while self.solve_linear():
+                self.infer_knowledge()
+
         # remove empty sentences
         self.remove_empty_sentences()
 
-        updated = True
+    def remove_candidate(self, cell):
+        """
+        Removes a cell from the candidates for a random move, if present
+        """
+        index = cell[0] * self.width + cell[1]
+        position = self.candidate_positions[index]
+        if position < 0:
+            return
+
+        # move the last candidate into the removed one's place
+        last = self.candidates.pop()
+        if last != index:
+            self.candidates[position] = last
+            self.candidate_positions[last] = position
+        self.candidate_positions[index] = -1
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to knowledge unless it is empty or already known,
+        indexes it by its cells and queues it for inference
+        """
+        if isinstance(sentence, Sentence):
+            sentence = BitmaskSentence.from_sentence(sentence, self.width)
 
-        # mark new safes and mines
-        while updated:
-            updated = self.mark_cells()
+        key = sentence.key()
+        if not sentence.mask or key in self.sentence_keys:
+            return
+
+        self.knowledge.append(sentence)
+        self.sentence_keys.add(key)
+        self.pending[id(sentence)] = sentence
+        for index in sentence.indices():
+            self.cell_sentences.setdefault(index, []).append(sentence)
+
+    def sentence_changed(self, sentence):
+        """
+        Queues a sentence whose cells have been marked for inference,
+        or retires it if it is now empty or a duplicate
+        """
+        key = sentence.key()
+        if sentence.mask and key not in self.sentence_keys:
+            self.sentence_keys.add(key)
+            self.pending[id(sentence)] = sentence
+            return
+
+        # unindex the sentence and empty it, so it is removed from knowledge;
+        # compare by identity, since an equal duplicate may remain indexed
+        for index in sentence.indices():
+            self.cell_sentences[index] = [
+                other for other in self.cell_sentences[index]
+                if other is not sentence
+            ]
+        sentence.mask = 0
+        sentence.count = 0
 
     def get_unmarked_neighbors(self, cell):
         """
@@ -250,61 +589,79 @@ class MinesweeperAI():
 
         return neighbors, mine_count
 
-    def mark_cells(self):
+    def remove_empty_sentences(self):
         """
-        Marks cells as safe or mines based on knowledge
+        Removes empty sentences from knowledge
         """
-        updated = False
+        self.knowledge = [
+            sentence for sentence in self.knowledge if sentence.mask
+        ]
 
-        for sentence in self.knowledge:
+    def infer_knowledge(self):
+        """
+        Infers new knowledge based on existing knowledge
+
+        Only sentences added or changed since the last call are processed,
+        each marking its cells when they are all safe or all mines, and
+        otherwise combined with the sentences sharing a cell with it.
+        Sentences changed or inferred along the way are processed in turn,
+        until no new knowledge can be inferred.
+        """
+        while self.pending:
+            _, sentence = self.pending.popitem()
+
+            # skip sentences emptied since they were queued
+            if not sentence.mask:
+                continue
+
+            # mark new safes and mines
             known_safes = sentence.known_safes()
+            known_mines = sentence.known_mines()
 
             if known_safes:
-                for cell in known_safes.copy():
+                for cell in known_safes:
                     self.mark_safe(cell)
-                    updated = True
-
-            known_mines = sentence.known_mines()
+                continue
 
             if known_mines:
-                for cell in known_mines.copy():
+                for cell in known_mines:
                     self.mark_mine(cell)
-                    updated = True
+                continue
 
-        return updated
+            # infer new sentences, comparing only sentences that share a cell
+            others = {
+                id(other): other
+                for index in sentence.indices()
+                for other in self.cell_sentences.get(index, ())
+            }
 
-    def remove_empty_sentences(self):
-        """
-        Removes empty sentences from knowledge
-        """
-        for sentence in self.knowledge:
-            if not sentence.cells:
-                self.knowledge.remove(sentence)
+            for other in others.values():
+                if other.mask == sentence.mask and other.offset == sentence.offset:
+                    continue
 
-    def infer_knowledge(self):
+                if other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
+                elif sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
+
+    def solve_linear(self):
         """
-        Infers new knowledge based on existing knowledge
+        Marks the safes and mines found by solving each frontier component
+        as a linear system, returning whether any cell was marked.
         """
-        inferred_sentences = []
+        safes, mines = set(), set()
+        for sentences in self.frontier_components():
+            if len(sentences) > 1:
+                component_safes, component_mines = linear_deductions(sentences)
+                safes |= component_safes
+                mines |= component_mines
 
-        # infer new sentences
-        for sentence, other in itertools.product(self.knowledge, self.knowledge):
-            if sentence == other:
-                continue
-
-            if sentence.cells.issubset(other.cells):
-                inferred_cells = other.cells - sentence.cells
-                inferred_count = other.count - sentence.count
-
-                inferred_sentence = Sentence(inferred_cells, inferred_count)
-
-                inferred_sentences.append(inferred_sentence)
-                updated = True
+        for index in safes:
+            self.mark_safe(divmod(index, self.width))
+        for index in mines:
+            self.mark_mine(divmod(index, self.width))
 
-        # add inferred sentences to knowledge
-        for sentence in inferred_sentences:
-            if sentence not in self.knowledge:
-                self.knowledge.append(sentence)
+        return bool(safes or mines)
 
     def make_safe_move(self):
         """
@@ -315,12 +672,13 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        # get all safe moves
-        safe_moves = list(self.safes - self.moves_made)
-
         # return random safe move
-        if safe_moves:
-            return random.choice(safe_moves)
+        if self.safe_moves:
+            return self.safe_moves.choice()
+
+        # without a mine count, any candidate is as good a guess as another
+        if self.total_mines is None:
+            return divmod(random.choice(self.candidates), self.width)
 
         return None
 
@@ -330,13 +688,406 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Among those, picks the cells least likely to be mines according to
+        mine_probabilities, choosing randomly between equally likely ones.
+        Without the total number of mines there is no density to weigh the
+        frontier against, so the choice is uniform over all candidates.
         """
 
-        # get all possible moves
-        possible_moves = [(x, y) for x, y in itertools.product(range(self.height), range(self.width)) if (x, y) not in self.moves_made and (x, y) not in self.mines]
+        if not self.candidates:
+            return None
+
+        # safe cells are never mines
+        if self.safe_moves:
+            return self.safe_moves.choice()
+
+        # find the frontier cells least likely to be mines
+        frontier, other = self.mine_probabilities()
+        lowest = min(frontier.values(), default=1.0)
+        best_moves = [
+            index for index, p in frontier.items() if p <= lowest + 1e-9
+        ]
+
+        # choose among those and, if as likely, the unconstrained cells
+        unconstrained = len(self.candidates) - len(frontier)
+        if unconstrained and other <= lowest + 1e-9:
+            if other < lowest - 1e-9:
+                best_moves = []
+            if random.randrange(unconstrained + len(best_moves)) < unconstrained:
+                return self.random_unconstrained_move(frontier)
+
+        return divmod(random.choice(best_moves), self.width)
+
+    def random_unconstrained_move(self, frontier):
+        """
+        Returns a random candidate cell that is not in the frontier
+        """
 
-        # return random move
-        if possible_moves:
-            return random.choice(possible_moves)
+        # sample candidates, which is fast while the frontier is a small
+        # share of them, then fall back to listing the others
+        for _ in range(32):
+            index = random.choice(self.candidates)
+            if index not in frontier:
+                return divmod(index, self.width)
 
+        others = [index for index in self.candidates if index not in frontier]
+        return divmod(random.choice(others), self.width)
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each frontier cell is a mine, keyed
+        by bit index, and the probability for any other unknown cell.
+
+        The frontier, the unknown cells mentioned in knowledge, is split
+        into components that share no sentences. Mine configurations
+        consistent with each component are enumerated by backtracking, and
+        weighted by the number of ways to place the remaining mines among
+        the other unknown cells. Components that are too large to
+        enumerate, or frontiers too large to combine exactly, fall back to
+        approximations.
+        """
+        unknown = self.height * self.width - len(self.safes) - len(self.mines)
+        components = []
+        for sentences in self.frontier_components():
+            cells, configurations = self.enumerate_component(sentences)
+            estimates = None
+            if configurations is None:
+                estimates = estimate_component(sentences)
+            components.append((cells, configurations, estimates))
+
+        frontier_size = sum(len(cells) for cells, _, _ in components)
+        unconstrained = unknown - frontier_size
+
+        # remaining mines, or None if the total is unknown
+        remaining = None
+        if self.total_mines is not None:
+            remaining = self.total_mines - len(self.mines)
+
+        exact = (
+            remaining is not None
+            and frontier_size <= EXACT_FRONTIER_LIMIT
+            and all(estimates is None for _, _, estimates in components)
+        )
+        if exact:
+            return combine_exactly(components, unconstrained, remaining)
+        return combine_approximately(components, unconstrained, remaining)
+
+    def frontier_components(self):
+        """
+        Returns lists of the sentences in knowledge, grouped into connected
+        components of sentences linked by shared cells.
+        """
+        seen = set()
+        components = []
+
+        for sentence in self.knowledge:
+            if not sentence.mask or id(sentence) in seen:
+                continue
+
+            seen.add(id(sentence))
+            component = [sentence]
+            for current in component:
+                for index in current.indices():
+                    for other in self.cell_sentences.get(index, ()):
+                        if id(other) not in seen:
+                            seen.add(id(other))
+                            component.append(other)
+
+            components.append(component)
+
+        return components
+
+    def enumerate_component(self, sentences):
+        """
+        Returns the cells of a frontier component, as bit indices, and
+        its consistent mine configurations as a dict from number of mines
+        to (configuration count, {cell: count of those with a mine there}).
+
+        Configurations are None if the component has more than
+        COMPONENT_LIMIT cells or takes more than ENUMERATION_LIMIT steps.
+        """
+        cells = []
+        cell_sentences = dict()
+        for s, sentence in enumerate(sentences):
+            for index in sentence.indices():
+                if index not in cell_sentences:
+                    cells.append(index)
+                    cell_sentences[index] = []
+                cell_sentences[index].append(s)
+
+        # mines still needed and cells still unassigned in each sentence
+        needed = [sentence.count for sentence in sentences]
+        free = [len(sentence) for sentence in sentences]
+        assignment = [0] * len(cells)
+        configurations = dict()
+        steps = 0
+
+        def backtrack(i, mines):
+            nonlocal steps
+            if i == len(cells):
+                total, cell_counts = configurations.get(mines, (0, dict()))
+                for position, value in enumerate(assignment):
+                    if value:
+                        cell = cells[position]
+                        cell_counts[cell] = cell_counts.get(cell, 0) + 1
+                configurations[mines] = (total + 1, cell_counts)
+                return True
+
+            for value in (0, 1):
+                steps += 1
+                if steps > ENUMERATION_LIMIT:
+                    return False
+
+                # assign the cell, then check every sentence it is in
+                assignment[i] = value
+                consistent = True
+                for s in cell_sentences[cells[i]]:
+                    free[s] -= 1
+                    needed[s] -= value
+                    if not 0 <= needed[s] <= free[s]:
+                        consistent = False
+
+                finished = not consistent or backtrack(i + 1, mines + value)
+
+                for s in cell_sentences[cells[i]]:
+                    free[s] += 1
+                    needed[s] += value
+
+                if not finished:
+                    return False
+
+            return True
+
+        if len(cells) > COMPONENT_LIMIT or not backtrack(0, 0) or not configurations:
+            return cells, None
+        return cells, configurations
+
+
+def linear_deductions(sentences):
+    """
+    Returns the bit indices of cells that sentences, taken together,
+    prove to be safe and to be mines.
+
+    Each sentence is an equation: the sum of its cells, each 0 or 1, is
+    its count. The equations are reduced by Gaussian elimination over the
+    integers, then each reduced equation is checked against the bounds of
+    its left side: if the count equals the smallest or largest possible
+    sum, every cell in it is determined.
+    """
+
+    # equations as ({cell: coefficient}, count)
+    remaining = [
+        ({index: 1 for index in sentence.indices()}, sentence.count)
+        for sentence in sentences
+    ]
+    pivots = []
+
+    columns = sorted({index for row, _ in remaining for index in row})
+    for column in columns:
+        pivot = next((r for r in remaining if column in r[0]), None)
+        if pivot is None:
+            continue
+        remaining.remove(pivot)
+        pivot_row, pivot_count = pivot
+        pivot_coefficient = pivot_row[column]
+
+        # eliminate the column from every other equation
+        for rows in (pivots, remaining):
+            for i, (row, count) in enumerate(rows):
+                coefficient = row.get(column)
+                if not coefficient:
+                    continue
+                combined = {
+                    index: row.get(index, 0) * pivot_coefficient
+                    - pivot_row.get(index, 0) * coefficient
+                    for index in row.keys() | pivot_row.keys()
+                }
+                combined = {
+                    index: value for index, value in combined.items() if value
+                }
+                rows[i] = normalize_equation(
+                    combined, count * pivot_coefficient - pivot_count * coefficient
+                )
+
+        pivots.append(pivot)
+        remaining = [r for r in remaining if r[0]]
+
+    safes, mines = set(), set()
+    for row, count in pivots:
+        lowest = sum(value for value in row.values() if value < 0)
+        highest = sum(value for value in row.values() if value > 0)
+        if count == lowest:
+            safes.update(index for index, value in row.items() if value > 0)
+            mines.update(index for index, value in row.items() if value < 0)
+        elif count == highest:
+            mines.update(index for index, value in row.items() if value > 0)
+            safes.update(index for index, value in row.items() if value < 0)
+
+    return safes, mines
+
+
+def normalize_equation(row, count):
+    """
+    Returns an equation divided through by the greatest common divisor of
+    its coefficients and count.
+    """
+    divisor = math.gcd(count, *row.values())
+    if divisor > 1:
+        row = {index: value // divisor for index, value in row.items()}
+        count //= divisor
+    return row, count
+
+
+def estimate_component(sentences):
+    """
+    Returns an estimated mine probability for each cell in sentences,
+    keyed by bit index: the mean mine density of the sentences containing it.
+    """
+    densities = dict()
+    for sentence in sentences:
+        density = sentence.count / len(sentence)
+        for index in sentence.indices():
+            densities.setdefault(index, []).append(density)
+    return {
+        index: sum(values) / len(values) for index, values in densities.items()
+    }
+
+
+def log_comb(n, k):
+    """
+    Returns the natural logarithm of n choose k, or None if it is zero.
+    """
+    if not 0 <= k <= n:
         return None
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def combine_exactly(components, unconstrained, remaining):
+    """
+    Returns frontier and unconstrained mine probabilities, combining
+    enumerated components so that their configurations, together with
+    the mines left for unconstrained cells, use exactly `remaining` mines.
+    """
+
+    # number of configurations of each component, by number of mines,
+    # scaled so the largest is 1 to keep products within float range
+    polynomials = []
+    for _, configurations, _ in components:
+        largest = max(total for total, _ in configurations.values())
+        polynomial = [0.0] * (max(configurations) + 1)
+        for mines, (total, _) in configurations.items():
+            polynomial[mines] = total / largest
+        polynomials.append(polynomial)
+
+    # relative ways to place the other mines among unconstrained cells,
+    # given that t mines are in the frontier
+    frontier_size = sum(len(cells) for cells, _, _ in components)
+    logs = [log_comb(unconstrained, remaining - t)
+            for t in range(frontier_size + 1)]
+    largest = max((log for log in logs if log is not None), default=None)
+    if largest is None:
+        return combine_approximately(components, unconstrained, remaining)
+    ways = [0.0 if log is None else math.exp(log - largest) for log in logs]
+
+    # products of the polynomials before and after each component
+    prefixes = [[1.0]]
+    for polynomial in polynomials:
+        prefixes.append(multiply(prefixes[-1], polynomial))
+    suffixes = [[1.0]]
+    for polynomial in reversed(polynomials):
+        suffixes.append(multiply(suffixes[-1], polynomial))
+    suffixes.reverse()
+
+    everything = prefixes[-1]
+    total = sum(w * ways[t] for t, w in enumerate(everything))
+    if total == 0:
+        return combine_approximately(components, unconstrained, remaining)
+
+    other = 0.0
+    if unconstrained:
+        other = sum(
+            w * ways[t] * (remaining - t) / unconstrained
+            for t, w in enumerate(everything)
+        ) / total
+
+    probabilities = dict()
+    for c, (cells, configurations, _) in enumerate(components):
+        others = multiply(prefixes[c], suffixes[c + 1])
+        scale = max(total for total, _ in configurations.values())
+        for mines, (_, cell_counts) in configurations.items():
+
+            # weight of each configuration of this component with `mines`
+            weight = sum(
+                w * ways[mines + t] for t, w in enumerate(others)
+            ) / scale / total
+            for cell in cells:
+                probabilities[cell] = (probabilities.get(cell, 0.0)
+                                       + cell_counts.get(cell, 0) * weight)
+
+    return probabilities, other
+
+
+def combine_approximately(components, unconstrained, remaining):
+    """
+    Returns frontier and unconstrained mine probabilities, treating
+    components as independent and each unconstrained cell as a mine with
+    the density of mines left over once the frontier's expected mines are
+    taken out. Configurations with m mines are weighted by the odds of
+    that density to the power m.
+
+    If the total number of mines is unknown, configurations are weighted
+    equally and unconstrained cells take the mean frontier probability.
+    """
+    frontier_size = sum(len(cells) for cells, _, _ in components)
+    if remaining is None:
+        density = None
+    else:
+        density = remaining / max(unconstrained + frontier_size, 1)
+
+    # refine the density a few times, as it depends on the frontier
+    for _ in range(3):
+        odds = 1.0
+        if density is not None:
+            density = min(max(density, 1e-6), 1 - 1e-6)
+            odds = density / (1 - density)
+
+        probabilities = dict()
+        for cells, configurations, estimates in components:
+            if estimates is not None:
+                probabilities.update(estimates)
+                continue
+            weights = {
+                mines: total * odds ** mines
+                for mines, (total, _) in configurations.items()
+            }
+            total_weight = sum(weights.values())
+            for cell in cells:
+                probabilities[cell] = sum(
+                    cell_counts.get(cell, 0) * odds ** mines
+                    for mines, (_, cell_counts) in configurations.items()
+                ) / total_weight
+
+        if remaining is None or not unconstrained:
+            break
+        density = (remaining - sum(probabilities.values())) / unconstrained
+
+    if remaining is None:
+        density = (sum(probabilities.values()) / len(probabilities)
+                   if probabilities else 0.5)
+    elif unconstrained:
+        density = min(max(density, 0.0), 1.0)
+
+    return probabilities, density if density is not None else 0.0
+
+
+def multiply(a, b):
+    """
+    Returns the product of two polynomials given as coefficient lists.
+    """
+    product = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                product[i + j] += x * y
+    return product
@@ -0,0 +1,168 @@
+import argparse
+import functools
+import multiprocessing
+import random
+import time
+
+from minesweeper import SOLVERS, Minesweeper, MinesweeperAI
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI, without a display."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    mines = parser.add_mutually_exclusive_group()
+    mines.add_argument("--mines", type=int, help="number of mines (default 8)")
+    mines.add_argument("--density", type=float,
+                       help="fraction of cells that are mines")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    parser.add_argument("-p", "--processes", type=int, default=1)
+    parser.add_argument("--solver", choices=SOLVERS, default="subset",
+                        help="how the AI draws conclusions from knowledge")
+    parser.add_argument("--no-flood-fill", dest="flood_fill",
+                        action="store_false",
+                        help="reveal one cell per move, as before flood fill")
+    parser.add_argument("--unknown-mines", dest="known_mines",
+                        action="store_false",
+                        help="do not tell the AI how many mines there are")
+    args = parser.parse_args()
+
+    if args.density is not None:
+        mines = round(args.density * args.height * args.width)
+    else:
+        mines = 8 if args.mines is None else args.mines
+
+    start = time.perf_counter()
+    results = simulate(args.games, args.height, args.width, mines,
+                       seed=args.seed, processes=args.processes,
+                       solver=args.solver, flood_fill=args.flood_fill,
+                       known_mines=args.known_mines)
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {args.games} games ({args.height}x{args.width}, "
+          f"{mines} {'known' if args.known_mines else 'unknown'} mines, "
+          f"seed {args.seed}, {args.solver} solver) "
+          f"in {elapsed:.1f}s")
+    print(summarize(results))
+
+
+def play(seed, height, width, mines, solver="subset", flood_fill=True,
+         known_mines=True):
+    """
+    Plays one game with the AI, seeding the random module with `seed` so
+    that the board and every AI choice are reproducible. Moves on cells
+    with no neighboring mines reveal their whole empty region, unless
+    flood_fill is False. The AI is told the number of mines unless
+    known_mines is False.
+
+    Returns a dict with whether the game was won, the number of moves,
+    how many of them were guesses rather than known safe moves, and the
+    seconds taken to choose and learn from each move.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width,
+                       mines=mines if known_mines else None, solver=solver)
+
+    revealed = set()
+    latencies = []
+    guesses = 0
+    won = False
+
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            guesses += move is not None
+
+        # No moves left: won if every mine has been found
+        if move is None:
+            won = ai.mines == game.mines
+            break
+
+        # Lost if the move was a mine
+        if game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            break
+
+        if flood_fill:
+            region = game.reveal_region(move, revealed)
+            revealed.update(cell for cell, _ in region)
+            ai.add_knowledge_batch(region)
+        else:
+            revealed.add(move)
+            ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+
+        # Won once every safe cell is revealed
+        if len(revealed) == height * width - mines:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": len(latencies),
+        "guesses": guesses,
+        "latencies": latencies
+    }
+
+
+def simulate(games, height, width, mines, seed=0, processes=1,
+             solver="subset", flood_fill=True, known_mines=True):
+    """
+    Plays `games` games, game i with seed `seed + i`, on a pool of
+    `processes` processes, and returns their results in order.
+    """
+    player = functools.partial(play, height=height, width=width, mines=mines,
+                               solver=solver, flood_fill=flood_fill,
+                               known_mines=known_mines)
+    seeds = range(seed, seed + games)
+    if processes == 1:
+        return [player(s) for s in seeds]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(player, seeds, chunksize=max(1, games // (4 * processes)))
+
+
+def summarize(results):
+    """
+    Returns a report of win rate, average moves, the share of moves that
+    were deduced safe rather than guessed, and move latency percentiles
+    over game results.
+    """
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    guesses = sum(result["guesses"] for result in results)
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    lines = [
+        f"  Win rate: {wins / games:.1%} ({wins}/{games})",
+        f"  Average moves: {len(latencies) / games:.1f}",
+        f"  Deduced moves: {1 - guesses / max(len(latencies), 1):.1%} "
+        f"({guesses / games:.1f} guesses per game)"
+    ]
+    if latencies:
+        percentiles = ", ".join(
+            f"p{p} {percentile(latencies, p) * 1000:.3f}ms"
+            for p in (50, 90, 99)
+        )
+        lines.append(f"  Move latency: {percentiles}, "
+                     f"max {latencies[-1] * 1000:.3f}ms")
+    return "\n".join(lines)
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of sorted values, by nearest rank.
+    """
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+if __name__ == "__main__":
+    main()
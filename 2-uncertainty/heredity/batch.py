@@ -0,0 +1,178 @@
+import argparse
+import csv
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from heredity import METHODS, get_method, load_data, load_model
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for many families."
+    )
+    parser.add_argument("families",
+                        help="directory of family CSVs, or a manifest file "
+                             "listing one family CSV per line")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file, CSV or JSON lines (.jsonl)")
+    parser.add_argument("-m", "--method", choices=METHODS, default="junction")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--model", help="probability model file (JSON)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = load_model(args.model) if args.model else None
+    results = run(family_files(args.families), args.method, args.processes,
+                  model=model)
+    write(results, args.output)
+    elapsed = time.perf_counter() - start
+
+    cached = sum(result["cached"] for result in results)
+    print(f"{len(results)} families ({cached} cached) in {elapsed:.1f}s",
+          file=sys.stderr)
+
+
+def family_files(source):
+    """
+    Return the family CSVs in directory `source`, sorted by name, or the
+    paths listed in manifest file `source`, relative to the manifest.
+    """
+    if os.path.isdir(source):
+        return [
+            os.path.join(source, name) for name in sorted(os.listdir(source))
+            if name.endswith(".csv")
+        ]
+    directory = os.path.dirname(source)
+    with open(source) as f:
+        return [
+            os.path.join(directory, line.strip()) for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+def canonical(people):
+    """
+    Return a hashable key for a family's structure and evidence, with
+    people numbered in the order they are listed, and the list of their
+    names in that order.
+
+    Families listed in the same order with the same parents and known
+    traits share a key, whatever the people are called.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    key = tuple(
+        (
+            index.get(people[name]["mother"]),
+            index.get(people[name]["father"]),
+            people[name]["trait"]
+        )
+        for name in names
+    )
+    return key, names
+
+
+def infer(method, key, model=None, pooled=False):
+    """
+    Return the probabilities of the family with canonical `key` under
+    `model`, with people named by their numbers, and the seconds inference
+    took.
+
+    In a pool's worker (if `pooled`), methods that run chains in processes
+    of their own run a single chain instead, since workers cannot start
+    processes.
+    """
+    people = {
+        str(i): {
+            "name": str(i),
+            "mother": None if mother is None else str(mother),
+            "father": None if father is None else str(father),
+            "trait": trait
+        }
+        for i, (mother, father, trait) in enumerate(key)
+    }
+    function = get_method(method)
+    options = dict(model=model)
+    if pooled and "chains" in inspect.signature(function).parameters:
+        options["chains"] = 1
+    start = time.perf_counter()
+    probabilities = function(people, **options)
+    return probabilities, time.perf_counter() - start
+
+
+def run(files, method, processes, model=None):
+    """
+    Run inference with `method` and `model` on each family in `files`, once
+    per distinct structure and evidence, on a pool of `processes` processes.
+
+    Return a result per family, in order, with its probabilities by name,
+    the seconds taken to load it and to infer its probabilities, and
+    whether it reused another family's probabilities.
+    """
+    families = []
+    for path in files:
+        start = time.perf_counter()
+        key, names = canonical(load_data(path))
+        families.append((path, key, names, time.perf_counter() - start))
+
+    # Infer each distinct family once
+    keys = list(dict.fromkeys(key for _, key, _, _ in families))
+    processes = min(processes, len(keys))
+    if processes <= 1:
+        inferred = [infer(method, key, model) for key in keys]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            inferred = pool.starmap(
+                infer, [(method, key, model, True) for key in keys],
+                chunksize=max(1, len(keys) // (4 * processes))
+            )
+    cache = dict(zip(keys, inferred))
+
+    results = []
+    seen = set()
+    for path, key, names, loading in families:
+        probabilities, seconds = cache[key]
+        results.append({
+            "family": path,
+            "probabilities": {
+                name: probabilities[str(i)] for i, name in enumerate(names)
+            },
+            "seconds": loading + (0 if key in seen else seconds),
+            "cached": key in seen
+        })
+        seen.add(key)
+    return results
+
+
+def write(results, filename):
+    """
+    Write results to `filename`: a line per family if it ends in .jsonl,
+    otherwise a CSV row per person.
+    """
+    with open(filename, "w", newline="") as f:
+        if filename.endswith(".jsonl"):
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+            return
+
+        writer = csv.writer(f)
+        writer.writerow([
+            "family", "name", "gene_2", "gene_1", "gene_0",
+            "trait", "seconds", "cached"
+        ])
+        for result in results:
+            for name, probabilities in result["probabilities"].items():
+                writer.writerow([
+                    result["family"], name,
+                    *(f"{probabilities['gene'][g]:.6f}" for g in (2, 1, 0)),
+                    f"{probabilities['trait'][True]:.6f}",
+                    f"{result['seconds']:.6f}", int(result["cached"])
+                ])
+
+
+if __name__ == "__main__":
+    main()
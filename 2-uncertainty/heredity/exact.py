@@ -0,0 +1,198 @@
+import itertools
+
+from heredity import model_tables
+
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    A function from assignments of genes to variables (names of people) to
+    non-negative numbers, stored as a table keyed by tuples of genes in the
+    order of `variables`.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+    def __repr__(self):
+        return f"Factor({self.variables})"
+
+    def multiply(self, other):
+        """
+        Returns the product of this factor and another, over the union of
+        their variables.
+        """
+        variables = self.variables + tuple(
+            variable for variable in other.variables
+            if variable not in self.variables
+        )
+        mine = [variables.index(variable) for variable in self.variables]
+        theirs = [variables.index(variable) for variable in other.variables]
+        table = dict()
+        for genes in itertools.product(GENES, repeat=len(variables)):
+            table[genes] = (
+                self.table[tuple(genes[i] for i in mine)] *
+                other.table[tuple(genes[i] for i in theirs)]
+            )
+        return Factor(variables, table)
+
+    def sum_out(self, variable):
+        """
+        Returns the factor over every variable but `variable`, summing over
+        the genes `variable` may have.
+        """
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        table = dict.fromkeys(itertools.product(GENES, repeat=len(variables)), 0)
+        for genes, p in self.table.items():
+            table[genes[:position] + genes[position + 1:]] += p
+        return Factor(variables, table)
+
+    def marginal(self, variables):
+        """
+        Returns the factor over `variables`, in that order, summing over the
+        genes of every other variable.
+        """
+        positions = [self.variables.index(variable) for variable in variables]
+        table = dict.fromkeys(itertools.product(GENES, repeat=len(variables)), 0)
+        for genes, p in self.table.items():
+            table[tuple(genes[i] for i in positions)] += p
+        return Factor(variables, table)
+
+
+def variable_elimination(people, model=None):
+    """
+    Return each person's gene and trait probability distributions given
+    the known traits in `people`, by variable elimination over the Bayesian
+    network of genes of `model` (PROBS if None), in the format of
+    `enumerate_probabilities`.
+    """
+    factors = network_factors(people, model)
+    probabilities = dict()
+    for person in people:
+        gene = query(factors, person)
+        probabilities[person] = {
+            "gene": gene,
+            "trait": trait_distribution(people[person]["trait"], gene, model)
+        }
+    return probabilities
+
+
+def network_factors(people, model=None):
+    """
+    Return a factor for each person's gene given their parents' genes,
+    with the probability of their known trait, if any, multiplied in.
+
+    Traits that are not known sum to 1 over both values, so they
+    contribute nothing to any gene's distribution and have no factor.
+    """
+    tables = model_tables(model)
+    factors = []
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+
+        if mother and father:
+            variables = (mother, father, person)
+            table = {
+                (m, f, g): tables["inheritance"][m][f][g]
+                for m in GENES for f in GENES for g in GENES
+            }
+        else:
+            variables = (person,)
+            table = {(g,): tables["gene"][g] for g in GENES}
+
+        if trait is not None:
+            for genes in table:
+                table[genes] *= tables["trait"][genes[-1]][trait]
+        factors.append(Factor(variables, table))
+    return factors
+
+
+def query(factors, person):
+    """
+    Return the normalized distribution of `person`'s genes, eliminating
+    every other variable of `factors` in min-fill order.
+    """
+    factors = list(factors)
+    for variable in elimination_order(factors, keep=person):
+        involved = [factor for factor in factors if variable in factor.variables]
+        factors = [factor for factor in factors if variable not in factor.variables]
+        product = involved[0]
+        for factor in involved[1:]:
+            product = product.multiply(factor)
+        factors.append(product.sum_out(variable))
+
+    result = factors[0]
+    for factor in factors[1:]:
+        result = result.multiply(factor)
+    total = sum(result.table.values())
+    return {g: result.table[(g,)] / total for g in reversed(GENES)}
+
+
+def elimination_order(factors, keep):
+    """
+    Return the variables of `factors` other than `keep`, ordered greedily so
+    that eliminating each adds the fewest edges between its neighbors in
+    the interaction graph (min-fill), breaking ties by fewest neighbors.
+    """
+    neighbors = interaction_graph(factors)
+    return [
+        variable for variable, _ in min_fill(neighbors, set(neighbors) - {keep})
+    ]
+
+
+def interaction_graph(factors):
+    """
+    Return a dict mapping each variable of `factors` to the set of other
+    variables it shares a factor with.
+    """
+    neighbors = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+            neighbors[variable].discard(variable)
+    return neighbors
+
+
+def min_fill(neighbors, variables):
+    """
+    Eliminate `variables` from the interaction graph `neighbors` in min-fill
+    order, connecting the neighbors of each eliminated variable, and return
+    a list of (variable, neighbors when eliminated) pairs.
+    """
+
+    def fill(variable):
+        adjacent = list(neighbors[variable])
+        missing = sum(
+            1 for a, b in itertools.combinations(adjacent, 2)
+            if b not in neighbors[a]
+        )
+        return missing, len(adjacent)
+
+    eliminated = []
+    remaining = set(variables)
+    while remaining:
+        variable = min(sorted(remaining), key=fill)
+        adjacent = neighbors.pop(variable)
+        for a in adjacent:
+            neighbors[a].discard(variable)
+            neighbors[a].update(adjacent - {a})
+        remaining.remove(variable)
+        eliminated.append((variable, adjacent))
+    return eliminated
+
+
+def trait_distribution(trait, gene, model=None):
+    """
+    Return the distribution of a trait, which is certain if it is known
+    and otherwise depends on the distribution of genes `gene`.
+    """
+    if trait is not None:
+        return {True: float(trait), False: float(not trait)}
+    tables = model_tables(model)
+    p = sum(gene[g] * tables["trait"][g][True] for g in GENES)
+    return {True: p, False: 1 - p}
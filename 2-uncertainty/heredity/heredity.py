@@ -1,5 +1,7 @@
 import csv
+import importlib
 import itertools
+import json
 import math
 import sys
 
@@ -37,13 +39,60 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Conditional probability tables of each model, by its parameters
+TABLES = dict()
+
+
+# Inference methods, by name, as the module (None for this one) and
+# function that compute `probabilities` from `people`
+METHODS = {
+    "enumerate": (None, "enumerate_probabilities"),
+    "elimination": ("exact", "variable_elimination"),
+    "junction": ("junction", "junction_tree"),
+    "vectorized": ("vectorized", "vectorized_probabilities"),
+    "weighting": ("sampling", "likelihood_weighting"),
+    "gibbs": ("sampling", "gibbs_sampling")
+}
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3, 4] or sys.argv[2:3] and sys.argv[2] not in METHODS:
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}] [model.json]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) >= 3 else "enumerate"
+    model = load_model(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    # Compute gene and trait probabilities for each person
+    probabilities = get_method(method)(people, model=model)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def get_method(name):
+    """
+    Return the function implementing the inference method called `name`.
+    """
+    module, function = METHODS[name]
+    module = sys.modules[__name__] if module is None else importlib.import_module(module)
+    return getattr(module, function)
+
+
+def enumerate_probabilities(people, model=None):
+    """
+    Return each person's gene and trait probability distributions, by
+    summing joint probabilities over every assignment of genes consistent
+    with the known traits.
+    """
+    tables = model_tables(model)
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -61,38 +110,30 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Loop lazily over every assignment of 0, 1 or 2 genes to each person
+    names = list(people)
+    for genes in itertools.product((0, 1, 2), repeat=len(names)):
+        genes = dict(zip(names, genes))
+
+        # Known traits are fixed, and unknown traits are summed out below,
+        # so only genes need enumerating
+        p = evidence_probability(people, genes, model)
+        for person in names:
+            gene = genes[person]
+            trait = people[person]["trait"]
+            probabilities[person]["gene"][gene] += p
+            if trait is not None:
+                probabilities[person]["trait"][trait] += p
+            else:
+                for value in (True, False):
+                    probabilities[person]["trait"][value] += (
+                        p * tables["trait"][gene][value]
+                    )
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -117,6 +158,72 @@ def load_data(filename):
     return data
 
 
+def load_model(filename):
+    """
+    Load a probability model, in the format of PROBS, from a JSON file.
+    File assumed to contain an object with fields "gene", mapping 0, 1 and
+    2 to the unconditional probability of having that many copies of the
+    gene, "penetrance", mapping them to the probability of the trait, and
+    "mutation", the probability that a passed gene mutates.
+    """
+    with open(filename) as f:
+        data = json.load(f)
+    return {
+        "gene": {g: data["gene"][str(g)] for g in (2, 1, 0)},
+        "trait": {
+            g: {
+                True: data["penetrance"][str(g)],
+                False: 1 - data["penetrance"][str(g)]
+            }
+            for g in (2, 1, 0)
+        },
+        "mutation": data["mutation"]
+    }
+
+
+def model_tables(model=None):
+    """
+    Return the conditional probability tables of `model`, a dict in the
+    format of PROBS, or of PROBS itself if None, as lists indexed by numbers
+    of genes and traits:
+        * "gene": probability of each number of genes, without parents,
+        * "inheritance": probability of each number of genes, given the
+          mother's and then the father's number of genes,
+        * "trait": probability of not having and of having the trait, given
+          the number of genes.
+    Tables are computed once for each distinct model and shared.
+    """
+    model = PROBS if model is None else model
+    key = (
+        tuple(model["gene"][g] for g in range(3)),
+        tuple(model["trait"][g][trait] for g in range(3) for trait in (False, True)),
+        model["mutation"]
+    )
+    if key in TABLES:
+        return TABLES[key]
+
+    # Probability of passing on the gene, given the parent's number of genes
+    passes = [model["mutation"], 0.5, 1 - model["mutation"]]
+    inheritance = [[None] * 3 for _ in range(3)]
+    for mother, from_mother in enumerate(passes):
+        for father, from_father in enumerate(passes):
+            inheritance[mother][father] = [
+                # P(¬a ∧ ¬b) = P(1 - a)P(1 - b)
+                (1 - from_mother) * (1 - from_father),
+                # P(a ⊕ b) = P(a) + P(b) - 2P(a ∧ b)
+                from_mother + from_father - (from_mother * from_father * 2),
+                # P(a ∧ b) = P(a)P(b)
+                from_mother * from_father
+            ]
+
+    TABLES[key] = {
+        "gene": [model["gene"][g] for g in range(3)],
+        "inheritance": inheritance,
+        "trait": [[model["trait"][g][False], model["trait"][g][True]] for g in range(3)]
+    }
+    return TABLES[key]
+
+
 def powerset(s):
     """
     Return a list of all possible subsets of set s.
@@ -141,19 +248,6 @@ def get_gene_trait(person, one_gene, two_genes, have_trait=None):
     return g, t
 
 
-def get_inheritance_prob(person, one_gene, two_genes):
-    # just don't like if-elif-else
-    gene, _ = get_gene_trait(person, one_gene, two_genes)
-    gene_to_prob = {
-        0: PROBS["mutation"],
-        1: 0.5,
-        2: 1 - PROBS["mutation"]
-    }
-    p_inheritance = gene_to_prob[gene]
-
-    return p_inheritance
-
-
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -165,6 +259,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
+    tables = model_tables()
     probs = []
     children = set()
 
@@ -176,29 +271,20 @@ def joint_probability(people, one_gene, two_genes, have_trait):
 
         gene, trait = get_gene_trait(person, one_gene, two_genes, have_trait)
 
-        p_gene = PROBS["gene"][gene]
-        p_trait = PROBS["trait"][gene][trait]
+        p_gene = tables["gene"][gene]
+        p_trait = tables["trait"][gene][trait]
 
         probs.append(p_gene)
         probs.append(p_trait)
 
     # iterate through people with parents
     for person in children:
-        # just don't like if-elif-else
-        from_mother = get_inheritance_prob(people[person]["mother"], one_gene, two_genes)
-        from_father = get_inheritance_prob(people[person]["father"], one_gene, two_genes)
+        mother_gene, _ = get_gene_trait(people[person]["mother"], one_gene, two_genes)
+        father_gene, _ = get_gene_trait(people[person]["father"], one_gene, two_genes)
         gene, trait = get_gene_trait(person, one_gene, two_genes, have_trait)
-        gene_to_prob = {
-            # P(¬a ∧ ¬b) = P(1 - a)P(1 - b)
-            0: (1 - from_mother) * (1 - from_father),
-            # P(a ⊕ b) = P(a) + P(b) - 2P(a ∧ b)
-            1: from_mother + from_father - (from_mother * from_father * 2),
-            # P(a ∧ b) = P(a)P(b)
-            2: from_mother * from_father
-        }
 
-        p_gene = gene_to_prob[gene]
-        p_trait = PROBS["trait"][gene][trait]
+        p_gene = tables["inheritance"][mother_gene][father_gene][gene]
+        p_trait = tables["trait"][gene][trait]
 
         probs.append(p_gene)
         probs.append(p_trait)
@@ -208,6 +294,30 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     return joint_prob
 
 
+def evidence_probability(people, genes, model=None):
+    """
+    Compute and return the joint probability that everyone has the number
+    of genes in `genes`, a dict from person to 0, 1 or 2, and that everyone
+    whose trait is known has it or not as observed. Unknown traits are
+    left out, which sums over both values.
+    """
+    tables = model_tables(model)
+    p = 1
+    for person in people:
+        gene = genes[person]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother and father:
+            p *= tables["inheritance"][genes[mother]][genes[father]][gene]
+        else:
+            p *= tables["gene"][gene]
+
+        trait = people[person]["trait"]
+        if trait is not None:
+            p *= tables["trait"][gene][trait]
+    return p
+
+
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
     Add to `probabilities` a new joint probability `p`.
@@ -0,0 +1,197 @@
+import itertools
+
+from exact import (Factor, GENES, interaction_graph, min_fill, network_factors,
+                   trait_distribution)
+
+
+def junction_tree(people, model=None):
+    """
+    Return each person's gene and trait probability distributions given
+    the known traits in `people`, by calibrating a junction tree of the
+    Bayesian network of genes of `model` (PROBS if None) once, in the
+    format of `enumerate_probabilities`.
+    """
+    factors = network_factors(people, model)
+    cliques, edges = compile_tree(factors)
+    beliefs = calibrate(cliques, edges, factors)
+
+    # Read each person's genes off the smallest clique that contains them
+    smallest = dict()
+    for i, clique in enumerate(cliques):
+        for person in clique:
+            if person not in smallest or len(clique) < len(cliques[smallest[person]]):
+                smallest[person] = i
+
+    probabilities = dict()
+    for person in people:
+        factor = beliefs[smallest[person]].marginal((person,))
+        total = sum(factor.table.values())
+        gene = {g: factor.table[(g,)] / total for g in reversed(GENES)}
+        probabilities[person] = {
+            "gene": gene,
+            "trait": trait_distribution(people[person]["trait"], gene, model)
+        }
+    return probabilities
+
+
+def compile_tree(factors):
+    """
+    Return the cliques of a junction tree covering `factors`, as tuples of
+    variables, and its edges, as a dict mapping each clique's index to the
+    set of indices of its neighbors.
+
+    Families without inbreeding loops are trees already: each family
+    (mother, father and child) is a clique, joined by the parents and
+    children they share. Only when those cliques cannot be joined into a
+    tree is the graph triangulated, eliminating variables in min-fill order.
+    """
+    cliques = maximal([factor.variables for factor in factors])
+    edges = spanning_tree(cliques)
+    if not running_intersection(cliques, edges):
+        neighbors = interaction_graph(factors)
+        cliques = maximal([
+            (variable, *sorted(adjacent))
+            for variable, adjacent in min_fill(neighbors, set(neighbors))
+        ])
+        edges = spanning_tree(cliques)
+    return cliques, edges
+
+
+def maximal(scopes):
+    """
+    Return the scopes, without duplicates, that are not contained in any
+    other scope.
+    """
+    sets = []
+    for scope in sorted(scopes, key=len, reverse=True):
+        if not any(set(scope) <= other for other in sets):
+            sets.append(set(scope))
+    return [tuple(sorted(clique)) for clique in sets]
+
+
+def spanning_tree(cliques):
+    """
+    Return the edges of a spanning forest of `cliques` with the largest
+    total separator size, joining only cliques that share a variable.
+    """
+    containing = dict()
+    for i, clique in enumerate(cliques):
+        for variable in clique:
+            containing.setdefault(variable, []).append(i)
+    candidates = {
+        (i, j) for indices in containing.values()
+        for i, j in itertools.combinations(indices, 2)
+    }
+    candidates = sorted(
+        candidates,
+        key=lambda pair: (-len(set(cliques[pair[0]]) & set(cliques[pair[1]])), pair)
+    )
+
+    # Kruskal's algorithm, with union-find over clique indices
+    parent = list(range(len(cliques)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edges = {i: set() for i in range(len(cliques))}
+    for i, j in candidates:
+        a, b = find(i), find(j)
+        if a != b:
+            parent[a] = b
+            edges[i].add(j)
+            edges[j].add(i)
+    return edges
+
+
+def running_intersection(cliques, edges):
+    """
+    Return True if, for every variable, the cliques containing it form a
+    connected subtree, which makes the tree a junction tree.
+    """
+    containing = dict()
+    for clique in cliques:
+        for variable in clique:
+            containing[variable] = containing.get(variable, 0) + 1
+    joined = dict.fromkeys(containing, 0)
+    for i in edges:
+        for j in edges[i]:
+            if i < j:
+                for variable in set(cliques[i]) & set(cliques[j]):
+                    joined[variable] += 1
+    return all(joined[variable] == containing[variable] - 1
+               for variable in containing)
+
+
+def calibrate(cliques, edges, factors):
+    """
+    Return the belief of each clique, the product of its factors and the
+    messages from all its neighbors, after passing messages towards a root
+    of each tree and back out again.
+    """
+
+    # Multiply each factor into one clique that contains its variables,
+    # starting from ones over every clique's variables, so that each
+    # potential covers the separators its messages are summed onto
+    potentials = [
+        Factor(clique, dict.fromkeys(itertools.product(GENES, repeat=len(clique)), 1))
+        for clique in cliques
+    ]
+    for factor in factors:
+        i = min(
+            (i for i, clique in enumerate(cliques)
+             if set(factor.variables) <= set(clique)),
+            key=lambda i: len(cliques[i])
+        )
+        potentials[i] = potentials[i].multiply(factor)
+
+    # Order each tree from its root, so that parents precede children
+    order = []
+    parents = dict()
+    for root in range(len(cliques)):
+        if root in parents:
+            continue
+        parents[root] = None
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            for j in sorted(edges[i]):
+                if j not in parents:
+                    parents[j] = i
+                    stack.append(j)
+
+    messages = dict()
+
+    def send(i, j):
+        product = potentials[i]
+        for k in edges[i]:
+            if k != j:
+                product = product.multiply(messages[k, i])
+        separator = tuple(v for v in cliques[j] if v in cliques[i])
+        message = product.marginal(separator)
+
+        # Rescale, so that long chains of evidence do not underflow
+        total = sum(message.table.values())
+        messages[i, j] = Factor(separator, {
+            genes: p / total for genes, p in message.table.items()
+        })
+
+    # Collect evidence towards each root, then distribute it back out
+    for i in reversed(order):
+        if parents[i] is not None:
+            send(i, parents[i])
+    for i in order:
+        for j in edges[i]:
+            if j != parents[i]:
+                send(i, j)
+
+    beliefs = []
+    for i in range(len(cliques)):
+        belief = potentials[i]
+        for k in edges[i]:
+            belief = belief.multiply(messages[k, i])
+        beliefs.append(belief)
+    return beliefs
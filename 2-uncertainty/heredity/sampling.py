@@ -0,0 +1,326 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from heredity import load_data, load_model, model_tables
+
+# Default budget: total samples across chains, and chains run in parallel
+SAMPLES = 100000
+CHAINS = 4
+
+# Most samples per batch, and fewest batches per chain when the sample
+# budget allows, since standard errors are estimated from batch means
+BATCH_SIZE = 1000
+BATCHES = 10
+
+# Gibbs sweeps discarded at the start of each chain
+BURN_IN = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate gene and trait probabilities by sampling."
+    )
+    parser.add_argument("data")
+    parser.add_argument("sampler", choices=SAMPLERS)
+    parser.add_argument("-n", "--samples", type=int, default=SAMPLES,
+                        help="total samples across all chains")
+    parser.add_argument("-t", "--seconds", type=float,
+                        help="stop sampling after this many seconds")
+    parser.add_argument("-c", "--chains", type=int, default=CHAINS,
+                        help="chains, each run in its own process")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first chain; chain i uses seed + i")
+    parser.add_argument("--model", help="probability model file (JSON)")
+    args = parser.parse_args()
+
+    people = load_data(args.data)
+    model = load_model(args.model) if args.model else None
+    start = time.perf_counter()
+    probabilities, errors, samples = estimate(
+        people, args.sampler, samples=args.samples, seconds=args.seconds,
+        chains=args.chains, seed=args.seed, model=model
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{samples} samples in {elapsed:.1f}s ({args.sampler}, "
+          f"{args.chains} chains)")
+
+    # Print results, with standard errors
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                error = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def likelihood_weighting(people, model=None, samples=SAMPLES, seconds=None,
+                         chains=CHAINS, seed=0):
+    """
+    Return each person's estimated gene and trait probability distributions,
+    in the format of `enumerate_probabilities`, by likelihood weighting.
+    """
+    return estimate(people, "weighting", samples=samples, seconds=seconds,
+                    chains=chains, seed=seed, model=model)[0]
+
+
+def gibbs_sampling(people, model=None, samples=SAMPLES, seconds=None,
+                   chains=CHAINS, seed=0):
+    """
+    Return each person's estimated gene and trait probability distributions,
+    in the format of `enumerate_probabilities`, by Gibbs sampling.
+    """
+    return estimate(people, "gibbs", samples=samples, seconds=seconds,
+                    chains=chains, seed=seed, model=model)[0]
+
+
+def estimate(people, sampler, samples=SAMPLES, seconds=None, chains=CHAINS,
+             seed=0, model=None):
+    """
+    Run `chains` chains of `sampler` on the network of genes of `model`
+    (PROBS if None), chain i seeded with `seed + i`, each drawing its share
+    of `samples` or stopping once `seconds` have passed since the call,
+    whichever comes first. The time budget covers all chains, including
+    any waiting for a free process.
+
+    Return the estimated probabilities, their standard errors in the same
+    format, and the number of samples drawn. Errors are estimated from the
+    spread of the estimates of each batch of samples, which accounts for
+    the correlation between successive Gibbs samples, and are NaN when
+    fewer than two batches were drawn.
+    """
+    network = Network(people, model)
+
+    # One deadline for every chain, as wall-clock time, which processes share
+    deadline = None if seconds is None else time.time() + seconds
+    arguments = [
+        (network, sampler, samples // chains + (i < samples % chains),
+         deadline, seed + i, i == 0)
+        for i in range(chains)
+    ]
+    if chains == 1:
+        results = [run_chain(*arguments[0])]
+    else:
+        with multiprocessing.Pool(min(chains, multiprocessing.cpu_count())) as pool:
+            results = pool.starmap(run_chain, arguments)
+    batches = [batch for result in results for batch in result]
+
+    # Ratio estimate of each marginal, with a delta-method standard error
+    # over batches, each a triple of the number of samples and the totals
+    # of weights and of weighted values
+    weight = sum(w for _, w, _ in batches)
+    totals = [sum(values[k] for _, _, values in batches) for k in range(network.size)]
+    means = [total / weight for total in totals]
+    errors = []
+    for k in range(network.size):
+        if len(batches) < 2:
+            errors.append(math.nan)
+            continue
+        spread = sum((values[k] - means[k] * w) ** 2 for _, w, values in batches)
+        errors.append(math.sqrt(spread / (len(batches) - 1) * len(batches)) / weight)
+
+    probabilities = dict()
+    standard_errors = dict()
+    for i, person in enumerate(network.names):
+        gene = {g: means[network.gene_slot(i, g)] for g in (2, 1, 0)}
+        trait = means[network.trait_slot(i)]
+        probabilities[person] = {
+            "gene": gene,
+            "trait": {True: trait, False: 1 - trait}
+        }
+        error = errors[network.trait_slot(i)]
+        standard_errors[person] = {
+            "gene": {g: errors[network.gene_slot(i, g)] for g in (2, 1, 0)},
+            "trait": {True: error, False: error}
+        }
+    samples = sum(count for count, _, _ in batches)
+    return probabilities, standard_errors, samples
+
+
+class Network():
+    """
+    The Bayesian network of a family, with people numbered in topological
+    order (parents before children) and the conditional probability tables
+    of a model.
+    """
+
+    def __init__(self, people, model=None):
+
+        # Number people so that parents come before their children
+        self.names = []
+        placed = set()
+
+        def place(person):
+            if person in placed:
+                return
+            placed.add(person)
+            for parent in (people[person]["mother"], people[person]["father"]):
+                if parent:
+                    place(parent)
+            self.names.append(person)
+
+        for person in people:
+            place(person)
+        index = {person: i for i, person in enumerate(self.names)}
+
+        # Parents of each person, as indices, or None for founders
+        self.parents = [
+            (index[people[person]["mother"]], index[people[person]["father"]])
+            if people[person]["mother"] and people[person]["father"] else None
+            for person in self.names
+        ]
+        self.children = [[] for _ in self.names]
+        for i, parents in enumerate(self.parents):
+            if parents is not None:
+                for parent in parents:
+                    self.children[parent].append(i)
+
+        tables = model_tables(model)
+        self.prior = tables["gene"]
+        self.inherit = tables["inheritance"]
+        self.penetrance = [tables["trait"][g][True] for g in range(3)]
+
+        # Probability of each person's known trait given their genes, or 1
+        self.traits = [people[person]["trait"] for person in self.names]
+        self.likelihood = [
+            [1, 1, 1] if trait is None else
+            [tables["trait"][g][trait] for g in range(3)]
+            for trait in self.traits
+        ]
+
+    @property
+    def size(self):
+        """Number of estimated values: three genes and a trait per person."""
+        return 4 * len(self.names)
+
+    def gene_slot(self, i, gene):
+        return 4 * i + gene
+
+    def trait_slot(self, i):
+        return 4 * i + 3
+
+    def distribution(self, i, genes):
+        """
+        Return the distribution of person i's genes given their parents'
+        genes, before any evidence.
+        """
+        if self.parents[i] is None:
+            return self.prior
+        mother, father = self.parents[i]
+        return self.inherit[genes[mother]][genes[father]]
+
+    def record(self, values, genes, weight):
+        """
+        Add a sample of `genes` with `weight` to the totals `values`.
+
+        Unknown traits are not sampled: each adds the probability of the
+        trait given the sampled genes, which has lower variance.
+        """
+        for i, gene in enumerate(genes):
+            values[4 * i + gene] += weight
+            trait = self.traits[i]
+            if trait is None:
+                values[4 * i + 3] += weight * self.penetrance[gene]
+            elif trait:
+                values[4 * i + 3] += weight
+
+    def weighted_sample(self, rng):
+        """
+        Return genes sampled in topological order, ignoring evidence, and the
+        likelihood of the known traits given them.
+        """
+        genes = []
+        weight = 1
+        for i in range(len(self.names)):
+            gene = rng.choices((0, 1, 2), self.distribution(i, genes))[0]
+            genes.append(gene)
+            weight *= self.likelihood[i][gene]
+        return genes, weight
+
+    def resample(self, i, genes, rng):
+        """
+        Sample person i's genes given everyone else's genes and the evidence,
+        which depend only on i's parents, children and children's other
+        parents (i's Markov blanket).
+        """
+        weights = []
+        for gene in range(3):
+            w = self.distribution(i, genes)[gene] * self.likelihood[i][gene]
+            for child in self.children[i]:
+                mother, father = self.parents[child]
+                m = gene if mother == i else genes[mother]
+                f = gene if father == i else genes[father]
+                w *= self.inherit[m][f][genes[child]]
+            weights.append(w)
+        genes[i] = rng.choices((0, 1, 2), weights)[0]
+
+
+def run_chain(network, sampler, samples, deadline, seed, first=True):
+    """
+    Draw `samples` samples from `network` with `sampler`, in batches of
+    at most BATCH_SIZE, stopping early at `deadline`, a time.time() value,
+    if given, and return a (samples, weight, values) triple of totals for
+    each batch.
+
+    The deadline is checked before each sample, including during Gibbs
+    burn-in. The first chain always draws at least one sample, so that
+    there is an estimate; other chains may draw none.
+    """
+    rng = random.Random(seed)
+
+    def expired():
+        return deadline is not None and time.time() > deadline
+
+    if not first and expired():
+        return []
+
+    people = range(len(network.names))
+    if sampler == "gibbs":
+
+        # Start from a sample consistent with the evidence, then burn in
+        genes, weight = network.weighted_sample(rng)
+        while weight == 0:
+            genes, weight = network.weighted_sample(rng)
+        for _ in range(BURN_IN):
+            if expired():
+                break
+            for i in people:
+                network.resample(i, genes, rng)
+
+    size = max(1, min(BATCH_SIZE, samples // BATCHES))
+    batches = []
+    drawn = 0
+    while drawn < samples and not ((drawn or not first) and expired()):
+        values = [0] * network.size
+        count = 0
+        total = 0
+        while count < min(size, samples - drawn):
+            if (drawn + count or not first) and expired():
+                break
+            if sampler == "gibbs":
+                for i in people:
+                    network.resample(i, genes, rng)
+                weight = 1
+            else:
+                genes, weight = network.weighted_sample(rng)
+            network.record(values, genes, weight)
+            count += 1
+            total += weight
+        if count:
+            batches.append((count, total, values))
+            drawn += count
+    return batches
+
+
+SAMPLERS = {
+    "weighting": likelihood_weighting,
+    "gibbs": gibbs_sampling
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from exact import trait_distribution
+from heredity import model_tables
+
+# Number of gene configurations to evaluate at once, which bounds memory
+CHUNK_SIZE = 1 << 16
+
+
+def vectorized_probabilities(people, model=None, chunk_size=CHUNK_SIZE):
+    """
+    Return each person's gene and trait probability distributions, in the
+    format of `enumerate_probabilities`, by computing the joint probability
+    under `model` (PROBS if None) of every assignment of genes with array
+    operations.
+
+    Assignments are numbered 0 to 3^n - 1 and decoded in chunks of
+    `chunk_size` into rows of each person's number of genes, in base 3.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    # Conditional probability tables, indexed by numbers of genes
+    tables = model_tables(model)
+    prior = np.array(tables["gene"])
+    inherit = np.array(tables["inheritance"])
+
+    # Probability of each person's known trait given their genes, or 1
+    likelihood = np.ones((n, 3))
+    for person in names:
+        if people[person]["trait"] is not None:
+            likelihood[index[person]] = [
+                tables["trait"][g][people[person]["trait"]] for g in range(3)
+            ]
+
+    children = [index[p] for p in names if people[p]["mother"] and people[p]["father"]]
+    founders = [index[p] for p in names if index[p] not in children]
+    mothers = [index[people[names[i]]["mother"]] for i in children]
+    fathers = [index[people[names[i]]["father"]] for i in children]
+
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    people_index = np.arange(n)
+    totals = np.zeros((n, 3))
+    configurations = 3 ** n
+    for start in range(0, configurations, chunk_size):
+        numbers = np.arange(start, min(start + chunk_size, configurations), dtype=np.int64)
+        genes = numbers[:, None] // powers % 3
+
+        p = (
+            prior[genes[:, founders]].prod(axis=1) *
+            inherit[genes[:, mothers], genes[:, fathers], genes[:, children]].prod(axis=1) *
+            likelihood[people_index, genes].prod(axis=1)
+        )
+        np.add.at(
+            totals,
+            (np.broadcast_to(people_index, genes.shape), genes),
+            np.broadcast_to(p[:, None], genes.shape)
+        )
+
+    totals /= totals.sum(axis=1, keepdims=True)
+    probabilities = dict()
+    for person in names:
+        gene = {g: float(totals[index[person], g]) for g in (2, 1, 0)}
+        probabilities[person] = {
+            "gene": gene,
+            "trait": trait_distribution(people[person]["trait"], gene, model)
+        }
+    return probabilities
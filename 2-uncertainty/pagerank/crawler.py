@@ -0,0 +1,122 @@
+import argparse
+import array
+import multiprocessing
+import os
+import re
+import time
+
+from graph import Graph
+
+# Characters of HTML read from a file at once
+CHUNK_SIZE = 1 << 16
+
+# Links to other pages
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# End of a chunk that may be the start of a link continued in the next one
+PARTIAL = re.compile(r"<(?:a(?:\s[^>]*|\s[^>]*?href=\"[^\"]*)?)?\Z")
+
+# Number of each page being crawled, shared with worker processes
+index = dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a directory of HTML pages into a link graph."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("output",
+                        help="path of the graph, saved as output.pages "
+                             "and output.edges")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = crawl_graph(args.corpus, processes=args.processes)
+    graph.save(args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Crawled {len(graph)} pages and {len(graph.targets)} links "
+          f"in {elapsed:.1f}s")
+
+
+def scan_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield the target of each link in the HTML file at `path`, reading it
+    `chunk_size` characters at a time.
+
+    Whatever follows the last link in a chunk and could begin another is
+    carried over to the next chunk, so links split between chunks are found.
+    """
+    with open(path) as f:
+        carry = ""
+        while True:
+            chunk = f.read(chunk_size)
+            text = carry + chunk
+            end = 0
+            for match in LINK.finditer(text):
+                yield match.group(1)
+                end = match.end()
+            if not chunk:
+                return
+            partial = PARTIAL.search(text, end)
+            carry = text[partial.start():] if partial else ""
+
+
+def page_links(filename, directory, chunk_size=CHUNK_SIZE):
+    """
+    Return the numbers of the pages in the corpus that page `filename`
+    links to, other than itself, in order and without duplicates.
+    """
+    links = {
+        index[link]
+        for link in scan_links(os.path.join(directory, filename), chunk_size)
+        if link in index and link != filename
+    }
+    return array.array("q", sorted(links))
+
+
+def share_index(pages):
+    """Number `pages` for `page_links`, in this process."""
+    global index
+    index = {page: i for i, page in enumerate(pages)}
+
+
+def crawl_graph(directory, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Return the graph of links between the HTML pages in `directory`, with
+    pages numbered in order of filename, scanning pages on a pool of
+    `processes` processes (one per CPU if None).
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    arguments = [(page, directory, chunk_size) for page in pages]
+    processes = min(processes or os.cpu_count(), max(len(pages), 1))
+    if processes == 1:
+        share_index(pages)
+        results = (page_links(*argument) for argument in arguments)
+        return build(pages, results)
+    with multiprocessing.Pool(processes, share_index, (pages,)) as pool:
+        results = pool.starmap(
+            page_links, arguments,
+            chunksize=max(1, len(pages) // (16 * processes))
+        )
+        return build(pages, results)
+
+
+def build(pages, results):
+    """
+    Return the graph of `pages`, given the numbers of the pages each of
+    them links to, in order.
+    """
+    offsets = array.array("q", [0])
+    targets = array.array("q")
+    for links in results:
+        targets.extend(links)
+        offsets.append(len(targets))
+    return Graph(pages, offsets, targets)
+
+
+if __name__ == "__main__":
+    main()
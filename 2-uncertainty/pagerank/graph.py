@@ -0,0 +1,116 @@
+import array
+
+
+class Graph():
+    """
+    Links between pages in compressed sparse row (CSR) form: pages are
+    numbered in order, and the pages linked to by page i are
+    targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.offsets = offsets
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.pages)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Return the graph of `corpus`, a dictionary mapping each page to the
+        set of pages it links to. Links to pages outside the corpus are
+        left out.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        offsets = array.array("q", [0])
+        targets = array.array("q")
+        for page in pages:
+            targets.extend(sorted(index[link] for link in corpus[page] if link in index))
+            offsets.append(len(targets))
+        return cls(pages, offsets, targets)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return the graph saved at `path` by `save`.
+        """
+        with open(path + ".pages") as f:
+            pages = f.read().splitlines()
+        edges = array.array("q")
+        with open(path + ".edges", "rb") as f:
+            edges.frombytes(f.read())
+        sources, targets = edges[0::2], edges[1::2]
+
+        # Count each page's links, then place them in order of source
+        counts = [0] * (len(pages) + 1)
+        for source in sources:
+            counts[source + 1] += 1
+        offsets = array.array("q", counts)
+        for i in range(len(pages)):
+            offsets[i + 1] += offsets[i]
+        if any(sources[k] > sources[k + 1] for k in range(len(sources) - 1)):
+            order = sorted(range(len(sources)), key=sources.__getitem__)
+            targets = array.array("q", (targets[k] for k in order))
+        return cls(pages, offsets, targets)
+
+    def save(self, path):
+        """
+        Save the graph to `path`.pages, a page name per line in order, and
+        `path`.edges, each link as a pair of 64-bit page numbers, source then
+        target, in native byte order.
+        """
+        with open(path + ".pages", "w") as f:
+            for page in self.pages:
+                f.write(f"{page}\n")
+        edges = array.array("q", bytes(16 * len(self.targets)))
+        for i in range(len(self)):
+            for k in range(self.offsets[i], self.offsets[i + 1]):
+                edges[2 * k] = i
+                edges[2 * k + 1] = self.targets[k]
+        with open(path + ".edges", "wb") as f:
+            edges.tofile(f)
+
+    def to_corpus(self):
+        """
+        Return a dictionary mapping each page to the set of pages it
+        links to.
+        """
+        return {
+            page: {self.pages[j] for j in self.links(i)}
+            for i, page in enumerate(self.pages)
+        }
+
+    def links(self, i):
+        """Return the numbers of the pages linked to by page i."""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def degrees(self):
+        """Return the number of links on each page."""
+        return array.array("q", (
+            self.offsets[i + 1] - self.offsets[i] for i in range(len(self))
+        ))
+
+    def transpose(self):
+        """
+        Return the graph with every link reversed, so that the pages
+        linked to by page i are the pages that link to page i.
+        """
+        n = len(self)
+        counts = [0] * (n + 1)
+        for target in self.targets:
+            counts[target + 1] += 1
+        offsets = array.array("q", counts)
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        # Place each link's source at the next free slot of its target
+        sources = array.array("q", bytes(8 * len(self.targets)))
+        free = array.array("q", offsets[:n])
+        for source in range(n):
+            for target in self.links(source):
+                sources[free[target]] = source
+                free[target] += 1
+        return Graph(self.pages, offsets, sources)
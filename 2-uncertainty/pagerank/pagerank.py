@@ -1,11 +1,26 @@
-import os
 import random
-import re
 import sys
 
+from crawler import crawl_graph
+from graph import Graph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Total change in PageRank values below which iteration stops
+TOLERANCE = 1e-6
+
+# Most random surfers sampled at once, the fewest steps each takes, and
+# the most visits counted at once
+WALKERS = 10000
+WALK_LENGTH = 100
+BATCH_SIZE = 1 << 20
+
 
 def main():
     if len(sys.argv) != 2:
@@ -27,25 +42,7 @@ def crawl(directory):
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    return crawl_graph(directory).to_corpus()
 
 
 def transition_model(corpus, page, damping_factor):
@@ -87,25 +84,75 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    sample = None
-    sample_count = {}
+    graph = Graph.from_corpus(corpus)
+    counts = random_surfer(graph, damping_factor, n)
+    return {page: count / n for page, count in zip(graph.pages, counts)}
 
-    for i in range(n):
-        # for 1st iter
-        if not sample:
-            sample = random.choice(list(corpus.keys()))
 
-        # for subsequent iters
-        else:
-            next_prob = transition_model(corpus, sample, damping_factor)
-            sample = random.choices(list(next_prob.keys()), list(next_prob.values()))[0]
+def random_surfer(graph, damping_factor, n):
+    """
+    Return how many of `n` samples of a random surfer on `graph` visit
+    each page, in order, starting from a page at random.
 
-        # count sample
-        sample_count[sample] = sample_count.get(sample, 0) + 1
+    With probability `damping_factor` the surfer follows one of the page's
+    links, chosen uniformly, so a link is picked by its position in the
+    page's links; otherwise, or if the page has no links, the surfer jumps
+    to any page.
+    """
+    if np is not None:
+        return numpy_random_surfer(graph, damping_factor, n)
+
+    pages = len(graph)
+    offsets = graph.offsets
+    targets = graph.targets
+    counts = [0] * pages
+    page = random.randrange(pages)
+    for _ in range(n):
+        counts[page] += 1
+        degree = offsets[page + 1] - offsets[page]
+        if degree and random.random() < damping_factor:
+            page = targets[offsets[page] + random.randrange(degree)]
+        else:
+            page = random.randrange(pages)
+    return counts
 
-    pagerank = {page: count / n for (page, count) in sample_count.items()}
 
-    return pagerank
+def numpy_random_surfer(graph, damping_factor, n):
+    """
+    Return sample counts like `random_surfer`, from up to WALKERS
+    independent surfers moving at once as NumPy arrays, each taking at
+    least WALK_LENGTH steps so that where they start matters little.
+    """
+    rng = np.random.default_rng(random.getrandbits(64))
+    pages = len(graph)
+    offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+    targets = np.frombuffer(graph.targets, dtype=np.int64)
+    degrees = np.diff(offsets)
+
+    walkers = max(1, min(WALKERS, n // WALK_LENGTH))
+    current = rng.integers(pages, size=walkers)
+    counts = np.zeros(pages, dtype=np.int64)
+
+    # Count visits a batch of steps at a time, bounding memory
+    steps = max(1, BATCH_SIZE // walkers)
+    batch = np.empty((steps, walkers), dtype=np.int64)
+    remaining = n
+    while remaining > 0:
+        rows = min(steps, -(-remaining // walkers))
+        for row in range(rows):
+            batch[row] = current
+            degree = degrees[current]
+            follow = (rng.random(walkers) < damping_factor) & (degree > 0)
+            chosen = rng.random(np.count_nonzero(follow)) * degree[follow]
+            links = targets[offsets[current[follow]] + chosen.astype(np.int64)]
+            current = rng.integers(pages, size=walkers)
+            current[follow] = links
+
+        # Leave out the visits beyond the n-th in the final step
+        visits = batch[:rows].ravel()[:remaining]
+        counts += np.bincount(visits, minlength=pages)
+        remaining -= len(visits)
+    return counts.tolist()
 
 
 def iterate_pagerank(corpus, damping_factor):
@@ -117,43 +164,71 @@ def iterate_pagerank(corpus, damping_factor):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    def sum_incoming_links(current_page):
-        sum = 0
+    graph = Graph.from_corpus(corpus)
+    ranks = power_iteration(graph, damping_factor)
+    return dict(zip(graph.pages, ranks))
 
-        # find pages that link to current_page
-        for page in corpus:
-            if current_page in corpus[page]:
-                sum += pagerank_prev[page] / len(corpus[page])
 
-        return sum
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE):
+    """
+    Return the PageRank of each page of `graph`, in order, updating all of
+    them at once until they change by less than `tolerance` in total.
 
-    # make pages with no links to have links to every page
-    for page in corpus:
-        if len(corpus[page]) < 1:
-            corpus[page] = set(corpus.keys())
+    Pages with no links are treated as linking to every page, including
+    themselves: their combined rank is shared evenly by all pages, rather
+    than adding links to the graph.
+    """
+    if np is not None:
+        return numpy_power_iteration(graph, damping_factor, tolerance)
 
-    # init variables
-    threshold = 0.001
+    n = len(graph)
     d = damping_factor
-    n = len(corpus)
-    pagerank = dict.fromkeys(corpus.keys(), 1/n)
+    degrees = graph.degrees()
+    incoming = graph.transpose()
+    ranks = [1 / n] * n
 
     while True:
-        pagerank_prev = pagerank.copy()
-
-        # iterate all pages with formula
-        for p in corpus:
-            pagerank[p] = ((1 - d)/n) + (d * sum_incoming_links(p))
 
-        # check if page rank for each page satisfies threshold
-        changes = [abs(curr - prev) for (curr, prev) in zip(list(pagerank.values()), list(pagerank_prev.values()))]
-        converged = [change <= threshold for change in changes]
-
-        # terminate if all pages have converged
-        if all(converged):
-            break
+        # Rank each page passes along each of its links
+        shares = [
+            rank / degree if degree else 0
+            for rank, degree in zip(ranks, degrees)
+        ]
+        dangling = sum(rank for rank, degree in zip(ranks, degrees) if not degree)
+        base = (1 - d) / n + d * dangling / n
+
+        updated = [
+            base + d * sum(map(shares.__getitem__, incoming.links(page)))
+            for page in range(n)
+        ]
+        change = sum(abs(new - old) for new, old in zip(updated, ranks))
+        ranks = updated
+        if change < tolerance:
+            return ranks
+
+
+def numpy_power_iteration(graph, damping_factor, tolerance):
+    """
+    Return the same ranks as `power_iteration`, with each update computed
+    by NumPy over the arrays of the graph's links.
+    """
+    n = len(graph)
+    d = damping_factor
+    offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+    targets = np.frombuffer(graph.targets, dtype=np.int64)
+    degrees = np.diff(offsets)
+    sources = np.repeat(np.arange(n), degrees)
+    dangling = degrees == 0
+    ranks = np.full(n, 1 / n)
 
-    return pagerank
+    while True:
+        shares = np.divide(ranks, degrees, out=np.zeros(n), where=~dangling)
+        updated = d * np.bincount(targets, weights=shares[sources], minlength=n)
+        updated += ((1 - d) + d * ranks[dangling].sum()) / n
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if change < tolerance:
+            return ranks.tolist()
 
 
 if __name__ == "__main__":